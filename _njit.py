@@ -0,0 +1,13 @@
+# _njit.py
+# numba.njit when numba is installed, otherwise a pass-through decorator so
+# the decorated kernels still run (slower) as plain Python.
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
@@ -1,5 +1,7 @@
 import os
+import queue
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
 
@@ -12,27 +14,75 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
 ALERT_FROM = os.getenv("ALERT_FROM")
 ALERT_TO = os.getenv("ALERT_TO")
 
-def send_trade_email(message, subject="message"):
-    msg = MIMEText(message)
-    msg["Subject"] = message
-    msg["From"] = ALERT_FROM
-    msg["To"] = ALERT_TO
+KEEPALIVE = 60  # seconds idle before pinging the open SMTP connection
+
+# outgoing mail is handed to one background worker holding a persistent login
+_Q: "queue.Queue[tuple[MIMEText, str]]" = queue.Queue()
+_worker_thread = None
+_worker_lock = threading.Lock()
 
+def _connect():
+    if SMTP_PORT == 465:
+        server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=30)
+    else:
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+        server.starttls()
+    server.login(SMTP_USER, SMTP_PASS)
+    return server
+
+def _close(server):
     try:
-        if SMTP_PORT == 465:
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT) as server:
-                server.login(SMTP_USER, SMTP_PASS)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(SMTP_USER, SMTP_PASS)
-                server.send_message(msg)
-        print(f"[email sent] {subject}")
-    except Exception as e:
-        print(f"[email error] {e}")
+        server.quit()
+    except Exception:
+        pass
+
+def _worker():
+    server = None
+    while True:
+        try:
+            msg, subject = _Q.get(timeout=KEEPALIVE)
+        except queue.Empty:
+            if server is not None:
+                try:
+                    server.noop()
+                except Exception:
+                    _close(server)
+                    server = None
+            continue
 
+        # one reconnect attempt covers a login that went stale while idle
+        for attempt in range(2):
+            try:
+                if server is None:
+                    server = _connect()
+                server.send_message(msg)
+                print(f"[email sent] {subject}")
+                break
+            except Exception as e:
+                if server is not None:
+                    _close(server)
+                server = None
+                if attempt:
+                    print(f"[email error] {e}")
+        _Q.task_done()
 
+def _ensure_worker():
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_worker, name="alerts", daemon=True)
+            _worker_thread.start()
 
+def send_trade_email(message, subject="message"):
+    """Queue an alert and return immediately; a background thread sends it."""
+    msg = MIMEText(message)
+    msg["Subject"] = message
+    msg["From"] = ALERT_FROM
+    msg["To"] = ALERT_TO
 
+    _ensure_worker()
+    _Q.put((msg, subject))
 
+def flush_emails():
+    """Block until every queued alert has been sent (or failed)."""
+    _Q.join()
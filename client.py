@@ -1,5 +1,9 @@
-import os, time, json, base64, requests
-from nacl.signing import SigningKey
+import os, time, base64, requests
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,9 +11,15 @@ load_dotenv()
 BASE = "https://trading.robinhood.com"
 ORDERS = "/api/v1/crypto/trading/orders/"
 
-def _canon(d: dict | None) -> str:
-    if not d: return ""
-    return json.dumps(d, separators=(',', ':'), sort_keys=True)
+def _canon(d: dict | None) -> bytes:
+    # compact, key-sorted JSON; these exact bytes are both signed and sent
+    if not d: return b""
+    return orjson.dumps(d, option=orjson.OPT_SORT_KEYS)
+
+@lru_cache(maxsize=32)
+def _path_method(path: str, method: str) -> bytes:
+    # signed message carries path then METHOD; both are constant per endpoint
+    return path.encode() + method.upper().encode()
 
 class RH:
     def __init__(self, api_key=None, priv_b64=None, dry_run=None):
@@ -17,44 +27,83 @@ class RH:
         priv_b64 = priv_b64 or os.getenv("RH_PRIVATE_KEY_B64")
         if not self.api_key or not priv_b64:
             raise ValueError("Missing RH_API_KEY or RH_PRIVATE_KEY_B64")
-        self.key = SigningKey(base64.b64decode(priv_b64))
+        # keygen.py emits the 32-byte seed; a 64-byte NaCl secret key carries it up front
+        seed = base64.b64decode(priv_b64)[:32]
+        self.key = ed25519.Ed25519PrivateKey.from_private_bytes(seed)
+        self._api_key_b = self.api_key.encode()
+        self._hdr_template = {
+            "x-api-key": self.api_key,
+            "x-timestamp": "",
+            "x-signature": "",
+            "Accept": "application/json",
+            "Content-Type": "application/json; charset=utf-8",
+        }
+        # per-path GET message templates; only the 10-digit timestamp slot changes
+        self._get_bufs: dict[str, bytes] = {}  # GET message templates; copied per call, never written
         self.dry = (str(dry_run).lower()=="true") if dry_run is not None else (os.getenv("RH_DRY_RUN","true").lower()=="true")
+        # pooled keep-alive session so signed calls skip the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+        self._session.headers["Connection"] = "keep-alive"
 
     def _sign(self, method: str, path: str, body: dict | None):
         ts = str(int(time.time()))
-        msg = f"{self.api_key}{ts}{path}{method.upper()}{_canon(body)}"
-        sig = self.key.sign(msg.encode()).signature
+        if body is None and len(ts) == 10 and method.upper() == "GET":
+            return ts, self._sign_get(path, ts)
+        msg = b"".join((self._api_key_b, ts.encode(), _path_method(path, method), _canon(body)))
+        sig = self.key.sign(msg)
         return ts, base64.b64encode(sig).decode()
 
+    def _sign_get(self, path: str, ts: str) -> str:
+        tpl = self._get_bufs.get(path)
+        if tpl is None:
+            if len(self._get_bufs) >= 32:
+                self._get_bufs.clear()  # per-order paths would otherwise pile up
+            tpl = self._api_key_b + b" " * 10 + _path_method(path, "GET")
+            self._get_bufs[path] = tpl
+        # private copy: the main loop and the fill thread sign GETs concurrently
+        buf = bytearray(tpl)
+        off = len(self._api_key_b)
+        buf[off:off + 10] = ts.encode()
+        return base64.b64encode(self.key.sign(bytes(buf))).decode()
+
     def _headers(self, method, path, body):
         ts, sig = self._sign(method, path, body)
-        return {
-            "x-api-key": self.api_key,
-            "x-timestamp": ts,
-            "x-signature": sig,
-            "Accept": "application/json",
-            "Content-Type": "application/json; charset=utf-8",
-        }
+        # copy, not shared: place_orders holds several signed headers at once
+        d = self._hdr_template.copy()
+        d["x-timestamp"] = ts
+        d["x-signature"] = sig
+        return d
 
-    def _req(self, method: str, path: str, body: dict | None = None):
-        url = BASE + path
+    def _build(self, method: str, path: str, body: dict | None = None):
+        # sign on the calling thread; returns everything _execute needs
         hdr = self._headers(method, path, body)
-        if self.dry and method.upper()=="POST":
-            redacted = {**hdr, "x-api-key":"***", "x-signature":"***"}
-            return {"dry_run": True, "url": url, "headers": redacted, "body": body}
         payload = _canon(body) if body is not None else None
-        r = requests.request(
-            method.upper(),
+        return method.upper(), BASE + path, hdr, payload
+
+    def _dry(self, url, hdr, body):
+        redacted = {**hdr, "x-api-key":"***", "x-signature":"***"}
+        return {"dry_run": True, "url": url, "headers": redacted, "body": body}
+
+    def _req(self, method: str, path: str, body: dict | None = None):
+        method, url, hdr, payload = self._build(method, path, body)
+        if self.dry and method=="POST":
+            return self._dry(url, hdr, body)
+        return self._execute(method, url, hdr, payload)
+
+    def _execute(self, method, url, hdr, payload):
+        r = self._session.request(
+            method,
             url,
             headers=hdr,
             data=payload,                     # send EXACT json we signed
-            timeout=30
+            timeout=(3.05, 30)
         )
         try:
             r.raise_for_status()
         except requests.HTTPError as e:
             raise RuntimeError(f"HTTP {r.status_code}: {r.text}") from e
-        return r.json() if r.content else {}
+        return orjson.loads(r.content) if r.content else {}
 
     def get_order(self, order_id: str):
         # order_id usually comes back in the POST response
@@ -67,6 +116,36 @@ class RH:
     def market_order(self, symbol: str, side: str,
                      quantity: float | None = None, usd_notional: float | None = None,
                      client_order_id: str | None = None):
+        body = self._order_body(symbol, side, quantity, usd_notional, client_order_id)
+        return self._req("POST", ORDERS, body)
+
+    def place_orders(self, orders: list[dict], max_workers: int = 8):
+        """
+        Submit several market orders concurrently. Each item takes the
+        market_order keyword args (symbol, side, quantity | usd_notional,
+        client_order_id). Results come back in input order; a failed order
+        yields its exception instead of aborting the batch.
+        """
+        bodies = [self._order_body(**o) for o in orders]
+        reqs = [self._build("POST", ORDERS, b) for b in bodies]
+        if self.dry:
+            return [self._dry(url, hdr, b) for (_, url, hdr, _), b in zip(reqs, bodies)]
+
+        def run(req):
+            try:
+                return self._execute(*req)
+            except Exception as e:
+                return e
+
+        if not reqs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(reqs))) as pool:
+            return list(pool.map(run, reqs))
+
+    @staticmethod
+    def _order_body(symbol: str, side: str,
+                    quantity: float | None = None, usd_notional: float | None = None,
+                    client_order_id: str | None = None) -> dict:
         if side not in ("buy","sell"):
             raise ValueError("side must be buy/sell")
         if (quantity is None) == (usd_notional is None):
@@ -82,7 +161,7 @@ class RH:
             body["market_order_config"]["asset_quantity"] = str(quantity)
         else:
             body["market_order_config"]["usd_notional"] = str(usd_notional)
-        return self._req("POST", ORDERS, body)
+        return body
 
 
 
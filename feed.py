@@ -1,17 +1,52 @@
 # feed.py
 import sys
 import time
-import random
+from types import MappingProxyType
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+
+# ------- Shared HTTP session -------
+
+# one pooled session for all providers so ticks reuse warm TCP/TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+_SESSION.headers["Connection"] = "keep-alive"
+
+# (connect, read) timeouts
+_TIMEOUT = (3.05, 10)
 
 # ------- Provider fetchers -------
 
 def _fetch_coinbase(symbol: str) -> float:
     # Coinbase v2 spot
     url = f"https://api.coinbase.com/v2/prices/{symbol}/spot"
-    r = requests.get(url, timeout=10)
+    r = _SESSION.get(url, timeout=_TIMEOUT)
     r.raise_for_status()
-    return float(r.json()["data"]["amount"])
+    raw = r.content
+    # fast path: amount is a quoted decimal string, parse the slice directly
+    i = raw.find(b'"amount":"')
+    if i >= 0:
+        i += 10
+        try:
+            return float(raw[i:raw.index(b'"', i)])
+        except ValueError:
+            pass
+    return float(orjson.loads(raw)["data"]["amount"])
+
+# Kraken pair mapping (default heuristic strips the dash)
+_KRAKEN_MAP = MappingProxyType({
+    "BTC-USD": "XBTUSD",
+    "ETH-USD": "ETHUSD",
+    "DOGE-USD": "XDGUSD",
+    "SHIB-USD": "SHIBUSD",  # <-- fixed typo (was SHIB-USB)
+})
+# Kraken answers some pairs under their legacy X/Z-prefixed names
+_KRAKEN_LEGACY = MappingProxyType({
+    "XXBTZUSD": "XBTUSD",
+    "XETHZUSD": "ETHUSD",
+})
 
 def _fetch_kraken(symbol: str) -> float:
     """
@@ -21,60 +56,154 @@ def _fetch_kraken(symbol: str) -> float:
       DOGE-USD -> XDGUSD
       SHIB-USD -> SHIBUSD
     """
-    mapping = {
-        "BTC-USD": "XBTUSD",
-        "ETH-USD": "ETHUSD",
-        "DOGE-USD": "XDGUSD",
-        "SHIB-USD": "SHIBUSD",  # <-- fixed typo (was SHIB-USB)
-    }
-    pair = mapping.get(symbol, symbol.replace("-", ""))  # default heuristic
+    pair = _KRAKEN_MAP.get(symbol) or symbol.replace("-", "")
     url = f"https://api.kraken.com/0/public/Ticker?pair={pair}"
-    r = requests.get(url, timeout=10)
+    r = _SESSION.get(url, timeout=_TIMEOUT)
     r.raise_for_status()
-    j = r.json()
+    raw = r.content
+    # fast path: slice c[0] out of the bytes instead of parsing every field
+    if raw.startswith(b'{"error":[]'):
+        i = raw.find(b'"c":["')
+        if i >= 0:
+            i += 6
+            try:
+                return float(raw[i:raw.index(b'"', i)])
+            except ValueError:
+                pass
+    j = orjson.loads(raw)
     if j.get("error"):
         raise RuntimeError(j["error"])
     # Kraken returns dict keyed by the pair code; 'c'[0] is last trade price
-    k = next(iter(j["result"].keys()))
-    return float(j["result"][k]["c"][0])
+    return float(next(iter(j["result"].values()))["c"][0])
+
+def _fetch_kraken_multi(symbols: list[str]) -> dict[str, float]:
+    """
+    One Ticker call for many symbols (pair=XBTUSD,ETHUSD,...).
+    Returns {symbol: last_trade_price} for every pair Kraken answered.
+    """
+    pairs = {(_KRAKEN_MAP.get(s) or s.replace("-", "")): s for s in symbols}
+    url = f"https://api.kraken.com/0/public/Ticker?pair={','.join(pairs)}"
+    r = _SESSION.get(url, timeout=_TIMEOUT)
+    r.raise_for_status()
+    j = orjson.loads(r.content)
+    if j.get("error"):
+        raise RuntimeError(j["error"])
+    # Kraken returns dict keyed by the pair code; 'c'[0] is last trade price
+    res = j["result"]
+    if len(symbols) == 1 and len(res) == 1:
+        # single pair: trust whatever key Kraken used
+        return {symbols[0]: float(next(iter(res.values()))["c"][0])}
+    out = {}
+    for k, v in res.items():
+        sym = pairs.get(k) or pairs.get(_KRAKEN_LEGACY.get(k, ""))
+        if sym is not None:
+            out[sym] = float(v["c"][0])
+    return out
 
 # ------- Core helpers -------
 
 # small in-memory cache so we can fall back if both providers fail
 _LAST_PRICE = {}
 
-def _try_with_retries(fn, attempts=2, backoff=0.3):
+# short-lived cache of fresh quotes: symbol -> (monotonic ts, unbiased price)
+_PRICE_CACHE: dict[str, tuple[float, float]] = {}
+CACHE_TTL = 1.0  # seconds; callers inside this window skip the network
+
+# previous tick per symbol, for coinbase_spot's delta display
+_PREV_PRICE: dict[str, float] = {}
+
+def _cached(symbol: str, ttl: float) -> float | None:
+    if ttl <= 0:
+        return None
+    ts, p = _PRICE_CACHE.get(symbol, (0.0, 0.0))
+    if p and time.monotonic() - ts < ttl:
+        return p
+    return None
+
+def _try_with_retries(fn, *args, attempts=2, backoff=0.3):
     last_err = None
     for i in range(attempts):
         try:
-            return fn()
+            return fn(*args)
         except Exception as e:
             last_err = e
             if i < attempts - 1:
                 time.sleep(backoff * (2 ** i))
     raise last_err
 
+# sticky provider for get_price: keep hitting the warm primary and only
+# rotate after it fails FAIL_THRESHOLD calls in a row
+_PROVIDER_STATE = {"primary_idx": 0, "fail_streak": 0}
+FAIL_THRESHOLD = 3
+
+def _note_primary(ok: bool, n: int) -> None:
+    if ok:
+        _PROVIDER_STATE["fail_streak"] = 0
+        return
+    _PROVIDER_STATE["fail_streak"] += 1
+    if _PROVIDER_STATE["fail_streak"] >= FAIL_THRESHOLD:
+        _PROVIDER_STATE["primary_idx"] = (_PROVIDER_STATE["primary_idx"] + 1) % n
+        _PROVIDER_STATE["fail_streak"] = 0
+
+def _jitter_ms() -> int:
+    # 0-511 ms of jitter from the clock's low bits; no RNG needed
+    return time.monotonic_ns() & 0x1FF
+
+# worker pool used to query providers concurrently
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="feed")
 
-def get_price(symbol: str, side: str | None = None, bias_bps: int = 50) -> float:
+def _race(sources, symbol: str):
+    """
+    Query every provider at once and return (name, price) from the first
+    one that succeeds. Losers still queued are cancelled; in-flight ones
+    are left to finish in the background.
+    """
+    futs = {_POOL.submit(fn, symbol): name for name, fn in sources}
+    pending = set(futs)
+    last_err = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            try:
+                price = f.result()
+            except Exception as e:
+                last_err = e
+                continue
+            for p in pending:
+                p.cancel()
+            return futs[f], price
+    raise RuntimeError(f"all providers failed: {last_err!r}")
+
+
+def get_price(symbol: str, side: str | None = None, bias_bps: int = 50,
+              cache_ttl: float = CACHE_TTL) -> float:
     """
     Return a spot price for symbol (e.g., 'BTC-USD').
     Optional 'side' applies a conservative bias:
       buy  -> +bias_bps
       sell -> -bias_bps
+    Quotes younger than cache_ttl seconds are served from memory.
     """
-    providers = [_fetch_coinbase, _fetch_kraken]
-    # randomize order a bit to avoid always hammering one provider
-    random.shuffle(providers)
-
-    price = None
+    price = _cached(symbol, cache_ttl)
     err = None
-    for fn in providers:
-        try:
-            price = _try_with_retries(lambda: fn(symbol))
-            break
-        except Exception as e:
-            err = e
-            continue
+    if price is None:
+        providers = [_fetch_coinbase, _fetch_kraken]
+        n = len(providers)
+        start = _PROVIDER_STATE["primary_idx"] % n
+
+        for k in range(n):
+            fn = providers[(start + k) % n]
+            try:
+                price = _try_with_retries(fn, symbol)
+                _PRICE_CACHE[symbol] = (time.monotonic(), price)
+                if k == 0:
+                    _note_primary(True, n)
+                break
+            except Exception as e:
+                err = e
+                if k == 0:
+                    _note_primary(False, n)
+                continue
 
     if price is None:
         # last-resort: stale cache if we have it
@@ -84,17 +213,72 @@ def get_price(symbol: str, side: str | None = None, bias_bps: int = 50) -> float
             # surface the last provider error
             raise RuntimeError(f"all providers failed for {symbol}: {err!r}")
 
+    # update cache with unbiased price for next time
+    _LAST_PRICE[symbol] = price
+
     # apply side bias (slippage cushion) consistently with comment
     if side == "buy":
-        price *= (1.0 + bias_bps / 10_000.0)   # +50 bps by default
-    elif side == "sell":
-        price *= (1.0 - bias_bps / 10_000.0)   # -50 bps by default
-
-    # update cache with unbiased price for next time
-    _LAST_PRICE[symbol] = price / (1.0 + bias_bps / 10_000.0) if side == "buy" else \
-                          price / (1.0 - bias_bps / 10_000.0) if side == "sell" else price
+        return float(price * (1.0 + bias_bps / 10_000.0))   # +50 bps by default
+    if side == "sell":
+        return float(price * (1.0 - bias_bps / 10_000.0))   # -50 bps by default
     return float(price)
 
+def get_prices(symbols: list[str], cache_ttl: float = CACHE_TTL) -> dict[str, float]:
+    """
+    Unbiased spot prices for several symbols, fetched from Kraken in one
+    request. Symbols Kraken does not return fall back to get_price().
+    """
+    out = {}
+    missing = []
+    for s in symbols:
+        p = _cached(s, cache_ttl)
+        if p is None:
+            missing.append(s)
+        else:
+            out[s] = p
+    if missing:
+        try:
+            fetched = _try_with_retries(_fetch_kraken_multi, missing)
+        except Exception:
+            fetched = {}
+        now = time.monotonic()
+        for s, p in fetched.items():
+            _PRICE_CACHE[s] = (now, p)
+            _LAST_PRICE[s] = p
+            out[s] = p
+        for s in missing:
+            if s not in out:
+                out[s] = get_price(s, cache_ttl=cache_ttl)
+    return out
+
+def spot_many(symbols: list[str], cache_ttl: float = CACHE_TTL) -> dict[str, float]:
+    """
+    Unbiased spot prices for several symbols in about one round trip:
+    Coinbase quotes are fetched concurrently on the feed pool and any
+    symbol that fails is filled in from one batched Kraken call.
+    """
+    out = {}
+    futs = {}
+    for s in symbols:
+        p = _cached(s, cache_ttl)
+        if p is None:
+            futs[s] = _POOL.submit(_fetch_coinbase, s)
+        else:
+            out[s] = p
+    failed = []
+    for s, f in futs.items():
+        try:
+            p = f.result()
+        except Exception:
+            failed.append(s)
+            continue
+        _PRICE_CACHE[s] = (time.monotonic(), p)
+        _LAST_PRICE[s] = p
+        out[s] = p
+    if failed:
+        out.update(get_prices(failed, cache_ttl=cache_ttl))
+    return out
+
 def qty_from_usd(usd: float, price: float, decimals: int = 8) -> float:
     """
     Convert USD notional to asset quantity, honoring exchange decimals.
@@ -103,70 +287,92 @@ def qty_from_usd(usd: float, price: float, decimals: int = 8) -> float:
         raise ValueError("price must be > 0")
     qty = usd / price
     # many crypto assets permit up to 8 decimals; clamp to provided rule
-    q = round(qty, decimals)
+    scale = 10 ** decimals
+    q = int(qty * scale + 0.5) / scale
     # guard tiny non-zero that rounds to 0 after broker truncation
     if q == 0.0 and qty > 0:
-        step = 10 ** (-decimals)
-        q = step
+        q = 1 / scale
     return q
 
 # --- Back-compat shim preserving old coinbase_spot behavior ---
-# Put this at the bottom of feed.py
 
-import sys  # make sure this import exists at top of file
+_GREEN = b"\033[92m"
+_RED   = b"\033[91m"
+_RESET = b"\033[0m"
+_LINE = bytearray()  # reused tick line buffer
+SHOW_TICKS = True    # per-tick delta line; main.py --quiet turns it off
+
+def _write_tick(name: str, symbol: str, price: float, prev: float, pct: float) -> None:
+    out = getattr(sys.stdout, "buffer", None)
+    if out is None:  # stdout replaced by a text-only stream
+        color, reset = (_GREEN if pct >= 0 else _RED).decode(), _RESET.decode()
+        sys.stdout.write(f"\r[feed] {name} {symbol} = {price:.8f}  "
+                         f"prev: {prev:.8f}, {color}{pct:+.4f}%{reset}    ")
+        sys.stdout.flush()
+        return
+    b = _LINE
+    b.clear()
+    b += b"\r[feed] "
+    b += name.encode()
+    b += b" "
+    b += symbol.encode()
+    b += b" = "
+    b += format(price, ".8f").encode()
+    b += b"  prev: "
+    b += format(prev, ".8f").encode()
+    b += b", "
+    b += _GREEN if pct >= 0 else _RED
+    b += format(pct, "+.4f").encode()
+    b += b"%"
+    b += _RESET
+    b += b"    "
+    sys.stdout.flush()  # keep ordering with earlier print() output
+    out.write(b)
+    out.flush()
 
-def coinbase_spot(symbol: str, retries: int = 3, base_delay: float = 0.5):
+def coinbase_spot(symbol: str, retries: int = 3, base_delay: float = 0.5,
+                  cache_ttl: float = CACHE_TTL):
     """
     Legacy entry point used by main.py.
-    - Tries multiple providers with retries + exponential backoff (with jitter).
+    - Races all providers in parallel; the first good quote wins.
+    - Retries the whole race with exponential backoff (with jitter).
     - Prints percent delta vs previous tick with color.
-    - Returns an unbiased spot price.
+    - Returns an unbiased spot price (cached for cache_ttl seconds).
     """
-    # keep previous price across calls
-    if not hasattr(coinbase_spot, "prev_price"):
-        coinbase_spot.prev_price = None
-
-    GREEN = "\033[92m"
-    RED   = "\033[91m"
-    RESET = "\033[0m"
+    hit = _cached(symbol, cache_ttl)
+    if hit is not None:
+        return float(hit)
 
     # Build provider list from available fetchers
     sources = [("Coinbase", _fetch_coinbase), ("Kraken", _fetch_kraken)]
     if "_fetch_robinhood" in globals():
         sources.append(("Robinhood", globals()["_fetch_robinhood"]))
 
+    base_ms = int(base_delay * 1000)
     last_err = None
-    for name, fn in sources:
-        for attempt in range(retries):
-            try:
-                price = fn(symbol)
-
-                # percent delta vs previous
-                prev = coinbase_spot.prev_price
-                if prev not in (None, 0):
-                    pct = (price / prev - 1.0) * 100.0
-                    color = GREEN if pct >= 0 else RED
-                    sys.stdout.write(
-                        f"\r[feed] {name} {symbol} = {price:.8f}  "
-                        f"prev: {prev:.8f}, {color}{pct:+.4f}%{RESET}    "
-                    )
-                    sys.stdout.flush()
-
-                coinbase_spot.prev_price = price
-                # refresh unbiased cache for fallbacks
-                try:
-                    _LAST_PRICE[symbol] = price
-                except Exception:
-                    pass
-                return float(price)
+    for attempt in range(retries):
+        try:
+            name, price = _race(sources, symbol)
 
-            except Exception as e:
-                last_err = e
-                wait = base_delay * (2 ** attempt) + random.uniform(0, 0.5)
-                print(f"[feed error] {name} {e} | retry {attempt+1}/{retries} in {wait:.2f}s")
-                time.sleep(wait)
+            # percent delta vs previous
+            prev = _PREV_PRICE.get(symbol)
+            if SHOW_TICKS and prev not in (None, 0):
+                _write_tick(name, symbol, price, prev, (price / prev - 1.0) * 100.0)
 
-        print(f"[feed] {name} failed after {retries} retries, switching...")
+            _PREV_PRICE[symbol] = price
+            _PRICE_CACHE[symbol] = (time.monotonic(), price)
+            # refresh unbiased cache for fallbacks
+            try:
+                _LAST_PRICE[symbol] = price
+            except Exception:
+                pass
+            return float(price)
+
+        except Exception as e:
+            last_err = e
+            delay_ms = (base_ms << attempt) + _jitter_ms()
+            print(f"[feed error] {e} | retry {attempt+1}/{retries} in {delay_ms / 1000:.2f}s")
+            time.sleep(delay_ms / 1000)
 
     raise RuntimeError(f"All feeds failed for {symbol}: {last_err!r}")
 
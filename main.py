@@ -1,13 +1,18 @@
 # main.py
-import argparse, json, time, os
+import argparse, time, os
+import orjson
 from client import RH
+import feed
 from feed import coinbase_spot, qty_from_usd
-from strategy import SwingWithTrend, SwingConfig
+from price_stream import PriceStream
+from strategy import SMAStrategy, SwingWithTrend, SwingConfig, Signal
 from risk import Risk
 from paper_account import PaperAccount
-import datetime
 from alerts import send_trade_email
 import csv
+import mmap
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
 
 
 # Per-symbol precision + min USD (tweak if RH rejects sizes)
@@ -18,16 +23,48 @@ ASSET_RULES = {
     "SHIB-USD": {"decimals": 0, "min_usd": 0.05},
 }
 
-def append_live_csv(path: str, row: dict):
-    keys = ["ts","symbol","side","qty","price","notional","order_id","state","note"]
-    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
-    with open(path, "a", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=keys)
+LIVE_KEYS = ["ts","symbol","side","qty","price","notional","order_id","state","note"]
+LIVE_FSYNC_EVERY = 10     # rows between forced fsyncs
+LIVE_FSYNC_SECS = 60.0    # or this long since the last one
+
+# path -> [file, DictWriter, rows since fsync, monotonic ts of last fsync]
+_LIVE_CSV = {}
+
+def _live_writer(path: str):
+    st = _LIVE_CSV.get(path)
+    if st is None:
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        f = open(path, "a", newline="")
+        w = csv.DictWriter(f, fieldnames=LIVE_KEYS)
         if new_file:
             w.writeheader()
-        w.writerow({k: row.get(k) for k in keys})
+        st = _LIVE_CSV[path] = [f, w, 0, time.monotonic()]
+    return st
+
+def append_live_csv(path: str, row: dict):
+    st = _live_writer(path)
+    f, w = st[0], st[1]
+    w.writerow({k: row.get(k) for k in LIVE_KEYS})
+    f.flush()  # in the OS page cache now; survives a process crash
+    st[2] += 1
+    if st[2] >= LIVE_FSYNC_EVERY or time.monotonic() - st[3] >= LIVE_FSYNC_SECS:
+        os.fsync(f.fileno())
+        st[2], st[3] = 0, time.monotonic()
+
+def maybe_fsync_live_csv():
+    # once per bot-loop tick, so a lone trade row isn't left waiting on the next write
+    now = time.monotonic()
+    for st in _LIVE_CSV.values():
+        if st[2] and now - st[3] >= LIVE_FSYNC_SECS:
+            os.fsync(st[0].fileno())
+            st[2], st[3] = 0, now
+
+def close_live_csv():
+    for f, *_ in _LIVE_CSV.values():
         f.flush()
         os.fsync(f.fileno())
+        f.close()
+    _LIVE_CSV.clear()
 
 def _to_float(x, default=0.0):
     try:
@@ -35,23 +72,62 @@ def _to_float(x, default=0.0):
     except Exception:
         return default
 
+TAIL_MIN_BYTES = 64 * 1024   # smaller files are just scanned front to back
+
+def _row_sym(row: dict) -> str:
+    return (row.get("symbol") or row.get("SYMBOL") or "")
+
 def load_last_trade(csv_path: str, symbol: str):
-    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+    if not os.path.exists(csv_path):
         return None
+    size = os.path.getsize(csv_path)
+    if size == 0:
+        return None
+    if size >= TAIL_MIN_BYTES:
+        return _load_last_trade_tail(csv_path, symbol, size)
     last = None
     with open(csv_path, newline="") as f:
         r = csv.DictReader(f, skipinitialspace=True)
         for row in r:
             row = {k.strip(): v for k, v in row.items() if k is not None}
-            sym = (row.get("symbol") or row.get("SYMBOL") or "")
+            sym = _row_sym(row)
             if sym.upper() == symbol.upper():
                 last = row
     return last
 
-def wait_for_fill(rh: RH, order_id: str, timeout=45, poll=1.0):
-    t0 = time.time()
+def _load_last_trade_tail(csv_path: str, symbol: str, size: int):
+    # walk lines backwards from EOF over an mmap; newest matching row wins
+    want = symbol.upper()
+    want_b = want.encode()
+    with open(csv_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = mm.find(b"\n") + 1
+        if start == 0:
+            return None  # header only
+        header = [h.strip() for h in next(csv.reader([mm[:start].decode()], skipinitialspace=True))]
+
+        end = len(mm)
+        while end > start:
+            nl = mm.rfind(b"\n", start, end)
+            lo = nl + 1 if nl >= 0 else start
+            raw = mm[lo:end]
+            end = nl if nl >= 0 else start
+            if want_b not in raw.upper():
+                continue
+            line = raw.decode().rstrip("\r")
+            if not line:
+                continue
+            vals = next(csv.reader([line], skipinitialspace=True))
+            row = dict(zip(header, vals))
+            if _row_sym(row).upper() == want:
+                return row
+    return None
+
+def wait_for_fill(rh: RH, order_id: str, timeout=45, poll=1.0, first_poll=0.2):
+    # market orders usually fill fast: start polling at first_poll, back off to poll
+    deadline = time.monotonic() + timeout
+    delay = first_poll
     last = None
-    while time.time() - t0 < timeout:
+    while time.monotonic() < deadline:
         od = rh.get_order(order_id)
         last = od
         state = str(od.get("state") or od.get("status") or "").lower()
@@ -59,29 +135,85 @@ def wait_for_fill(rh: RH, order_id: str, timeout=45, poll=1.0):
             return od
         if state in ("canceled", "rejected", "failed", "error"):
             return od
-        time.sleep(poll)
+        time.sleep(delay)
+        delay = min(delay * 2, poll)
     return last
 
+def _fill_row(filled: dict, side: str, symbol: str, order_id, qty, p):
+    state = (filled.get("state") or filled.get("status") or "unknown")
+    filled_qty = (
+        filled.get("filled_asset_quantity")
+        or filled.get("executed_quantity")
+        or filled.get("asset_quantity")
+        or qty
+    )
+    avg_price = filled.get("average_price") or filled.get("price") or p
+    row = {
+        "ts": time.time(),
+        "symbol": symbol,
+        "side": side,
+        "qty": float(filled_qty) if filled_qty is not None else None,
+        "price": float(avg_price) if avg_price is not None else None,
+        "notional": (float(filled_qty) * float(avg_price)) if filled_qty and avg_price else None,
+        "order_id": order_id,
+        "state": state,
+        "note": "",
+    }
+    return state, filled_qty, avg_price, row
+
+def _watch_fill(pool: ThreadPoolExecutor, rh: RH, out: dict, side: str, qty, p):
+    # fill polling runs on the worker so the price loop keeps ticking
+    order_id = out.get("id") or out.get("order_id")
+    if order_id:
+        fut = pool.submit(wait_for_fill, rh, order_id)
+    else:
+        fut = Future()
+        fut.set_result(out)
+    return {"side": side, "fut": fut, "out": out, "order_id": order_id, "qty": qty, "p": p}
+
+_RH = None
+
+def get_rh() -> RH:
+    # one client per process so every command reuses the same pooled session
+    global _RH
+    if _RH is None:
+        _RH = RH()
+    return _RH
+
 def _fmt(x, nd=8):
     return f"{x:.{nd}f}" if isinstance(x, (int, float)) else "None"
 
+# path -> {"mtime": st_mtime_ns, "data": parsed limits}; re-read only when the file changes
+_LIMITS_CACHE = {}
+
 def load_limits(path="limits.json"):
-    if not os.path.exists(path):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _LIMITS_CACHE.pop(path, None)
         return {}
-    with open(path) as f:
-        return json.load(f)
+    hit = _LIMITS_CACHE.get(path)
+    if hit is not None and hit["mtime"] == mtime:
+        return hit["data"]
+    with open(path, "rb") as f:
+        limits = orjson.loads(f.read())
+    _LIMITS_CACHE[path] = {"mtime": mtime, "data": limits}
+    return limits
+
+def _dumps(obj) -> str:
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
 
 def allowed_time():
-    now = datetime.datetime.utcnow().hour
+    now = time.gmtime().tm_hour
     # e.g., only trade 12:00–22:00 UTC
     return 12 <= now <= 22
 
 def cmd_list(_):
-    rh = RH()
-    print(json.dumps(rh.list_orders(), indent=2))
+    rh = get_rh()
+    print(_dumps(rh.list_orders()))
 
 def cmd_market_order(a):
-    rh = RH()
+    rh = get_rh()
     if a.notional is not None:
         p = coinbase_spot(a.symbol)
         dec = ASSET_RULES.get(a.symbol, {}).get("decimals", 8)
@@ -89,17 +221,19 @@ def cmd_market_order(a):
         res = rh.market_order(a.symbol, a.side, quantity=qty)  # send quantity
     else:
         res = rh.market_order(a.symbol, a.side, quantity=a.quantity)
-    print(json.dumps(res, indent=2))
+    print(_dumps(res))
 
 
 def cmd_sma_bot(a):
     symbol = a.symbol
+    if a.quiet:
+        feed.SHOW_TICKS = False
     position = 0
     entry = None
     peak = None
     cycle_usd = 0.0
     est_tranche_qty = 0.0
-    rh = RH()
+    rh = get_rh()
     account = PaperAccount(starting_usd=11000.0)
     state_csv = "live_trades.csv" if a.live else "paper_trades.csv"
     last = load_last_trade(state_csv, symbol)
@@ -171,6 +305,7 @@ def cmd_sma_bot(a):
             atr_cap_pct=5.0,
             threshold_abs=float(getattr(a, "threshold", 0.0)),
             trail_pct=(float(a.trail) if getattr(a, "trail", None) else None),
+            trail_lookback=getattr(a, "trail_lookback", None),
         )
     
         strat = SwingWithTrend(cfg)
@@ -201,71 +336,61 @@ def cmd_sma_bot(a):
     dec = ASSET_RULES.get(symbol, {}).get("decimals", 8)
     min_usd = ASSET_RULES.get(symbol, {}).get("min_usd", 0.05)
 
-    print(f"Bot start | {symbol} strategy={a.strategy} notional=${a.notional} live={a.live}")
+    stream = PriceStream(symbol).start() if a.stream else None
+
+    # loop invariants, bound once so the per-tick path skips repeated lookups
+    notional = float(a.notional)
+    period = a.period
+    live = a.live
+    trade_usd = max(notional, min_usd)
+    sell_mult = 1.0 + float(a.sell_pct) / 100.0
+    strat_update = strat.update
+    market_order = rh.market_order
+    # each poll must be a fresh quote: --period can be as short as the cache TTL
+    get_spot = partial(coinbase_spot, cache_ttl=0)
+    # decimals fixed for this symbol; quiet markets repeat the exact same quote
+    qfu = lru_cache(maxsize=256)(partial(qty_from_usd, decimals=dec))
+    sleep = time.sleep
+    monotonic = time.monotonic
+
+    fill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fill")
+    pending = None  # live order waiting on its fill; blocks new entries/exits
+
+    print(f"Bot start | {symbol} strategy={a.strategy} notional=${notional} live={live}")
+    next_t = monotonic()  # deadline of the next poll; keeps cadence free of drift
     try:
         while True:
             try:
-                p = coinbase_spot(symbol)
+                p = None
+                if stream is not None:
+                    # wake on the next websocket tick; REST only if the stream is quiet
+                    p = stream.next_price(period)
+                if p is None:
+                    p = get_spot(symbol)
             except Exception as e:
                 print("price error:", e)
-                time.sleep(a.period)
+                sleep(period)
+                next_t = monotonic()
                 continue
 
-            sig = strat.update(p)
-            if isinstance(sig, dict):
-                sig = sig.get("signal")
+            sig = strat_update(p)  # strategies return a Signal code
             tp = None
             if position == 1 and entry is not None:
-                tp = float(entry) * (1.0 + float(a.sell_pct) / 100.0)
+                tp = entry * sell_mult
 
-            # entry/exit
-            if sig in ("bull", "buy") and position == 0:
-                ok, why = risk.allow(a.notional)
+            # entry/exit (held off while a live order is still resolving)
+            if pending is not None:
+                pass
+            elif sig == Signal.BUY and position == 0:
+                ok, why = risk.allow(notional)
                 if not ok:
                     print("blocked buy:", why)
                 else:
-                    trade_usd = max(a.notional, min_usd)
                     cycle_usd = trade_usd
-                    qty = qty_from_usd(a.notional, p, decimals=dec)
-                    if a.live:
-                        out = rh.market_order(symbol, "buy", quantity=qty)
-                        order_id = out.get("id") or out.get("order_id")
-                    
-                        filled = wait_for_fill(rh, order_id) if order_id else out
-                        state = (filled.get("state") or filled.get("status") or "unknown")
-                    
-                        filled_qty = (
-                            filled.get("filled_asset_quantity")
-                            or filled.get("executed_quantity")
-                            or filled.get("asset_quantity")
-                            or qty
-                        )
-                        avg_price = filled.get("average_price") or filled.get("price") or p
-                    
-                        row = {
-                            "ts": time.time(),
-                            "symbol": symbol,
-                            "side": "buy",
-                            "qty": float(filled_qty) if filled_qty is not None else None,
-                            "price": float(avg_price) if avg_price is not None else None,
-                            "notional": (float(filled_qty) * float(avg_price)) if filled_qty and avg_price else None,
-                            "order_id": order_id,
-                            "state": state,
-                            "note": "",
-                        }
-                    
-                        if str(state).lower() in ("filled", "completed"):
-                            est_tranche_qty = float(filled_qty)
-                            append_live_csv("live_trades.csv", row)
-                            cycle_qty = float(filled_qty)
-                            cycle_usd = trade_usd
-                            position, entry, peak = 1, float(avg_price), float(avg_price)
-
-                    
-                        trade_msg = f"BUY {symbol} qty={qty} @ {p:.8f} state={state}"
-                        print(trade_msg)
-                        # send_trade_email(trade_msg)
-                        risk.record(trade_usd)
+                    qty = qfu(notional, p)
+                    if live:
+                        out = market_order(symbol, "buy", quantity=qty)
+                        pending = _watch_fill(fill_pool, rh, out, "buy", qty, p)
                                             
                     else:
                         account.buy(symbol, qty, p)
@@ -279,59 +404,21 @@ def cmd_sma_bot(a):
                         position, entry, peak = 1, (pos.avg_cost if pos else p), p
                         cycle_qty = qty
 
-            #elif position == 1 and (tp is not None and p >= tp) and sig in ("bear", "sell"):
+            #elif position == 1 and (tp is not None and p >= tp) and sig == Signal.SELL:
             elif position == 1 and (tp is not None and p >= tp):
-                trade_usd = max(a.notional, min_usd)
-                held = account.positions.get(symbol).qty if symbol in account.positions else 0.0
-                target_qty = qty_from_usd(trade_usd, p, decimals=dec)
-                qty = min(held, qty_from_usd(cycle_usd, p, decimals=dec))
-                if a.live:
-                    qty = qty_from_usd(cycle_usd, p, decimals=dec)
-                    qty = min(qty, est_tranche_qty)
+                cycle_qty_now = qfu(cycle_usd, p)
+                if live:
+                    qty = min(cycle_qty_now, est_tranche_qty)
                     if qty <= 0:
                         print("Live SELL blocked: held_qty is 0")
                     else:
-                        out = rh.market_order(symbol, "sell", quantity=qty)
-                        order_id = out.get("id") or out.get("order_id")
-                
-                        filled = wait_for_fill(rh, order_id) if order_id else out
-                        state = (filled.get("state") or filled.get("status") or "unknown")
-                
-                        filled_qty = (
-                            filled.get("filled_asset_quantity")
-                            or filled.get("executed_quantity")
-                            or filled.get("asset_quantity")
-                            or qty
-                        )
-                        avg_price = filled.get("average_price") or filled.get("price") or p
-                
-                        row = {
-                            "ts": time.time(),
-                            "symbol": symbol,
-                            "side": "sell",
-                            "qty": float(filled_qty) if filled_qty is not None else None,
-                            "price": float(avg_price) if avg_price is not None else None,
-                            "notional": (float(filled_qty) * float(avg_price)) if filled_qty and avg_price else None,
-                            "order_id": order_id,
-                            "state": state,
-                            "note": "",
-                        }
-                
-                        if str(state).lower() in ("filled", "completed"):
-                            append_live_csv("live_trades.csv", row)
-                            cycle_qty = 0.0
-                            est_tranche_qty = 0.0
-                            cycle_usd = 0.0
-                            position, entry, peak = 0, None, None
-                
-                        trade_msg = f"SELL {symbol} qty={qty} @ {p:.8f} state={state}"
-                        print(trade_msg)
+                        out = market_order(symbol, "sell", quantity=qty)
+                        pending = _watch_fill(fill_pool, rh, out, "sell", qty, p)
                     
                 else:
-                    trade_usd = max(a.notional, min_usd)
-                    target_qty = qty_from_usd(trade_usd, p, decimals=dec)
-                    held = account.positions.get(symbol).qty if symbol in account.positions else 0.0
-                    qty = min(held, qty_from_usd(cycle_usd, p, decimals=dec))
+                    pos = account.positions.get(symbol)
+                    held = pos.qty if pos else 0.0
+                    qty = min(held, cycle_qty_now)
                     account.sell(symbol, qty, p)
                     print(f"\n(paper) SELL {symbol} qty={qty} @ {p:.8f}")
                     trade_msg = f"SELL {symbol} qty={qty} @ {p:.8f}"                   
@@ -340,10 +427,61 @@ def cmd_sma_bot(a):
                     cycle_qty = 0.0
                     position, entry, peak = 0, None, None
 
-            time.sleep(a.period)
+            # apply a live fill once its poll finishes
+            if pending is not None and pending["fut"].done():
+                side, order_id, qty, op = pending["side"], pending["order_id"], pending["qty"], pending["p"]
+                try:
+                    filled = pending["fut"].result()
+                except Exception as e:
+                    print(f"fill check error: {e}")
+                    filled = pending["out"]
+                pending = None
+                state, filled_qty, avg_price, row = _fill_row(filled or {}, side, symbol, order_id, qty, op)
+
+                if side == "buy":
+                    if str(state).lower() in ("filled", "completed"):
+                        est_tranche_qty = float(filled_qty)
+                        append_live_csv("live_trades.csv", row)
+                        cycle_qty = float(filled_qty)
+                        cycle_usd = trade_usd
+                        position, entry, peak = 1, float(avg_price), float(avg_price)
+
+                    trade_msg = f"BUY {symbol} qty={qty} @ {op:.8f} state={state}"
+                    print(trade_msg)
+                    # send_trade_email(trade_msg)
+                    risk.record(trade_usd)
+                else:
+                    if str(state).lower() in ("filled", "completed"):
+                        append_live_csv("live_trades.csv", row)
+                        cycle_qty = 0.0
+                        est_tranche_qty = 0.0
+                        cycle_usd = 0.0
+                        position, entry, peak = 0, None, None
+
+                    trade_msg = f"SELL {symbol} qty={qty} @ {op:.8f} state={state}"
+                    print(trade_msg)
+
+            if live:
+                maybe_fsync_live_csv()
+            else:
+                account.maybe_flush_csv()
+
+            if stream is None:
+                next_t += period
+                remaining = next_t - monotonic()
+                if remaining > 0:
+                    sleep(remaining)
+                else:
+                    next_t = monotonic()  # fell behind; don't burst to catch up
 
     except KeyboardInterrupt:
+        if stream is not None:
+            stream.stop()
+        fill_pool.shutdown(wait=False)
+        if pending is not None:
+            print(f"Stopped with {pending['side'].upper()} order {pending['order_id']} still unconfirmed")
         if a.live:
+            close_live_csv()
             print("Stopped. Live mode...")
         else:
             fname = account.export_csv()
@@ -372,7 +510,10 @@ def build():
     s3.add_argument("--period", type=int, default=15, help="seconds between polls")
     s3.add_argument("--notional", type=float, default=0.05, help="USD per trade")
     s3.add_argument("--live", action="store_true", help="send real orders")
+    s3.add_argument("--quiet", action="store_true", help="don't print the per-tick price line")
+    s3.add_argument("--stream", action="store_true", help="react to Coinbase websocket ticks instead of polling every --period seconds")
     s3.add_argument("--trail", type=float, default=2.0, help="trailing stop in %")
+    s3.add_argument("--trail-lookback", type=int, default=None, help="trail from the high of the last N trail checks instead of the all-time high; only ticks past warm-up and the ATR gate count (for swingT)")
     s3.add_argument("--strategy", choices=["sma", "move", "swing", "swingT"], default="sma", help="strategy type")
     s3.add_argument("--threshold", type=float, default=0.0001, help="price move threshold (for 'move' strategy)")
     s3.add_argument("--trend", type=int, default=50, help="trend SMA window (for swing)")
@@ -4,16 +4,26 @@ from dataclasses import dataclass, asdict
 from typing import Dict, List
 import time
 import os
-import csv
+import atexit
+import operator
+
+CSV_BATCH_N = 32        # buffered rows before a write+fsync
+CSV_FLUSH_SECS = 1.0    # ...or this long since the last one
+# where available the live CSV is opened O_DSYNC, so each flushed write is
+# durable on return and no separate fsync is needed
+_O_DSYNC = getattr(os, "O_DSYNC", 0)
 
 @dataclass
 class Position:
     qty: float = 0.0
     avg_cost: float = 0.0  # USD per unit, includes buy-fee in cost basis
 
-@dataclass
+@dataclass(slots=True)
 class Fill:
-    ts: float
+    # time.monotonic_ns(); see PaperAccount.wall_time. The monotonic clock
+    # stops while the machine is suspended, so after a sleep the derived wall
+    # time runs behind real time by the suspended span.
+    ts: int
     symbol: str
     side: str          # "buy" or "sell"
     qty: float
@@ -23,6 +33,21 @@ class Fill:
     realized_pnl: float = 0.0
     cash_after: float = 0.0
 
+# (Fill attribute, CSV header) in column order
+_CSV_COLS = (
+    ("ts", "TS"),
+    ("symbol", "SYMBOL"),
+    ("side", "SIDE"),
+    ("qty", "QTY"),
+    ("price", "PRICE"),
+    ("fee", "FEE"),
+    ("notional", "NOTIONAL"),
+    ("realized_pnl", "REALIZED_PNL"),
+    ("cash_after", "BALANCE"),
+)
+_CSV_HEADER = ", ".join(h for _, h in _CSV_COLS) + "\n"
+_CSV_GETTER = operator.attrgetter(*(k for k, _ in _CSV_COLS))
+
 def _csv_escape(v):
     if v is None:
         return ""
@@ -31,16 +56,45 @@ def _csv_escape(v):
     if any(c in s for c in [",", '"', "\n"]):
         s = '"' + s.replace('"', '""') + '"'
     return s
+
+# the temp file's metadata is committed by the rename, so its data only needs fdatasync
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+def _fsync_dir(path):
+    # make the os.replace() durable; not possible on Windows, where this is a no-op
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _csv_line(ts, symbol, side, qty, price, fee, notional, realized_pnl, cash_after):
+    # numeric fields never need quoting; only the free-form symbol is escaped.
+    # Fills keep full precision; they are rounded for display here only.
+    return (f"{ts}, {_csv_escape(symbol)}, {side}, {round(qty, 12)}, {round(price, 12)}, "
+            f"{round(fee, 3)}, {round(notional, 3)}, {round(realized_pnl, 3)}, {round(cash_after, 2)}\n")
         
 class PaperAccount:
     def __init__(self, starting_usd: float = 10000.0, fee_bps: int = 35):
         self.usd: float = float(starting_usd)
         self.fee_bps: int = int(fee_bps)
         self.positions: Dict[str, Position] = {}
-        self.history: List[Dict] = []
+        self.history: List[Fill] = []
         self.realized_pnl_total: float = 0.0
         self.wins: int = 0
         self.losses: int = 0
+        self._csv_buffer: List[str] = []
+        self._last_flush: float = time.monotonic()
+        self._csv_fh = None
+        self._export_rows: List[tuple] = []  # (fill values, encoded row) from the last export_csv
+        # fills are stamped on the monotonic clock and mapped to wall time for output
+        self._ts_base_wall: float = time.time()
+        self._ts_base_mono: int = time.monotonic_ns()
 
     # --- helpers ---
     def _fee(self, notional: float) -> float:
@@ -49,9 +103,6 @@ class PaperAccount:
     def _pos(self, symbol: str) -> Position:
         return self.positions.setdefault(symbol, Position())
 
-    def qty_held(self, symbol: str) -> float:
-        return self.positions.get(symbol, Position()).qty
-
     # --- public API ---
     def buy(self, symbol: str, qty: float, price: float) -> bool:
         if qty <= 0 or price <= 0:
@@ -110,8 +161,10 @@ class PaperAccount:
     def equity(self, marks: Dict[str, float]) -> float:
         value = self.usd
         for sym, pos in self.positions.items():
-            if pos.qty > 0 and sym in marks and marks[sym] > 0:
-                value += pos.qty * float(marks[sym])
+            if pos.qty > 0:
+                m = marks.get(sym)
+                if m is not None and m > 0:
+                    value += pos.qty * float(m)
         return round(value, 8)
 
     def stats(self) -> Dict:
@@ -126,82 +179,109 @@ class PaperAccount:
             "positions": {k: asdict(v) for k, v in self.positions.items()},
         }
 
+    def wall_time(self, ts_ns: int) -> float:
+        """Epoch seconds for a Fill.ts taken on this account's monotonic clock."""
+        return self._ts_base_wall + (ts_ns - self._ts_base_mono) / 1e9
+
     def qty_held(self, symbol: str) -> float:
         p = self.positions.get(symbol)
         return 0.0 if p is None else float(p.qty)
     
     def set_csv(self, path: str):
+        self.close_csv()
         self.csv_path = path
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | _O_DSYNC, 0o644)
+        # one fstat on the descriptor we write through decides the header
+        self._csv_header_needed = os.fstat(fd).st_size == 0
+        self._csv_fh = open(fd, "a", newline="", buffering=1 << 16)
+        # dropped again by close_csv, so a closed account isn't pinned until exit
+        atexit.register(self.close_csv)
     
     
-    def _append_csv_row(self, row: dict):
-        path = getattr(self, "csv_path", None)
-        if not path:
+    def _csv_row(self, rec: Fill) -> str:
+        ts, *rest = _CSV_GETTER(rec)
+        return _csv_line(self.wall_time(ts), *rest)
+
+    def _append_csv_row(self, rec: Fill):
+        if self._csv_fh is None:
             return
     
-        cols = [
-            ("ts", "TS"),
-            ("symbol", "SYMBOL"),
-            ("side", "SIDE"),
-            ("qty", "QTY"),
-            ("price", "PRICE"),
-            ("fee", "FEE"),
-            ("notional", "NOTIONAL"),
-            ("realized_pnl", "REALIZED_PNL"),
-            ("cash_after", "BALANCE"),
-        ]
-    
-        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
-    
-        with open(path, "a", newline="") as f:
-            if new_file:
-                f.write(", ".join(h for _, h in cols) + "\n")
-    
-            line = ", ".join(_csv_escape(row.get(k)) for k, _ in cols) + "\n"
-            f.write(line)
-            f.flush()
+        if self._csv_header_needed:
+            self._csv_fh.write(_CSV_HEADER)
+            self._csv_header_needed = False
+        self._csv_buffer.append(self._csv_row(rec))
+        if (len(self._csv_buffer) >= CSV_BATCH_N
+                or time.monotonic() - self._last_flush > CSV_FLUSH_SECS):
+            self.flush_csv()
+
+    def maybe_flush_csv(self):
+        """Flush buffered rows older than CSV_FLUSH_SECS; the bot loop calls this every tick."""
+        if self._csv_buffer and time.monotonic() - self._last_flush > CSV_FLUSH_SECS:
+            self.flush_csv()
+
+    def flush_csv(self):
+        """Write buffered rows and fsync once for the whole batch."""
+        self._last_flush = time.monotonic()
+        f = self._csv_fh
+        if f is None or not self._csv_buffer:
+            return
+        f.write("".join(self._csv_buffer))
+        f.flush()
+        if not _O_DSYNC:
             os.fsync(f.fileno())
+        self._csv_buffer.clear()
+
+    def close_csv(self):
+        if self._csv_fh is None:
+            return
+        self.flush_csv()
+        self._csv_fh.close()
+        self._csv_fh = None
+        atexit.unregister(self.close_csv)
     
     def export_csv(self, path: str = "paper_trades.csv"):
-        cols = [
-            ("ts", "TS"),
-            ("symbol", "SYMBOL"),
-            ("side", "SIDE"),
-            ("qty", "QTY"),
-            ("price", "PRICE"),
-            ("fee", "FEE"),
-            ("notional", "NOTIONAL"),
-            ("realized_pnl", "REALIZED_PNL"),
-            ("cash_after", "BALANCE"),
-        ]
-    
+        # rows formatted by an earlier export are reused while the fill at that
+        # index still holds the same values, so a truncated, replaced or edited
+        # history is re-formatted; the whole file goes to the kernel in one write
+        cached = self._export_rows
+        n_cached = len(cached)
+        rows = []
+        append = rows.append
+        wall_time = self.wall_time
+        for i, rec in enumerate(self.history):
+            vals = _CSV_GETTER(rec)
+            if i < n_cached and cached[i][0] == vals:
+                append(cached[i])
+            else:
+                append((vals, _csv_line(wall_time(vals[0]), *vals[1:]).encode()))
+        self._export_rows = rows
+        payload = b"".join([_CSV_HEADER.encode(), *(line for _, line in rows)])
+
         tmp = path + ".tmp"
-        with open(tmp, "w", newline="") as f:
-            f.write(", ".join(h for _, h in cols) + "\n")
-            for row in self.history:
-                f.write(", ".join(_csv_escape(row.get(k)) for k, _ in cols) + "\n")
-            f.flush()
-            os.fsync(f.fileno())
+        with open(tmp, "wb", buffering=0) as f:
+            f.write(payload)
+            _fdatasync(f.fileno())
     
         os.replace(tmp, path)
+        _fsync_dir(path)
         return path
 
 
     # --- internals ---
     def _record(self, symbol, side, qty, price, fee, notional, realized):
         rec = Fill(
-            ts=time.time(),
+            ts=time.monotonic_ns(),
             symbol=symbol,
             side=side,
-            qty=round(qty, 12),
-            price=round(price, 12),
-            fee=round(fee, 3),
-            notional=round(notional, 3),
-            realized_pnl=round(realized, 3),
-            cash_after=round(self.usd, 2),
+            qty=qty,
+            price=price,
+            fee=fee,
+            notional=notional,
+            realized_pnl=realized,
+            cash_after=self.usd,
         )
-        self.history.append(asdict(rec))
-        self._append_csv_row(asdict(rec))
+        self.history.append(rec)
+        self._append_csv_row(rec)
 
 
 
@@ -0,0 +1,84 @@
+# price_stream.py
+from __future__ import annotations
+import threading
+import time
+from typing import Optional
+
+import orjson
+from websockets.sync.client import connect
+
+WS_URL = "wss://ws-feed.exchange.coinbase.com"
+
+class PriceStream:
+    """
+    Coinbase 'ticker' channel subscription running on a daemon thread.
+    Keeps the latest trade price in memory; next_price() blocks until a
+    tick newer than the last one returned arrives (or the timeout hits).
+    Reconnects with exponential backoff if the socket drops.
+    """
+    def __init__(self, symbol: str, url: str = WS_URL):
+        self.symbol = symbol
+        self.url = url
+        self.price: Optional[float] = None
+        self.ts: float = 0.0          # monotonic time of the last tick
+        self._seq = 0                 # bumps on every tick
+        self._read = 0                # last seq handed out by next_price
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = threading.Thread(target=self._run, name=f"ws-{symbol}", daemon=True)
+
+    def start(self) -> "PriceStream":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def next_price(self, timeout: float) -> Optional[float]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != self._read, timeout)
+            if self._seq == self._read:
+                return None
+            self._read = self._seq
+            return self.price
+
+    # --- internals ---
+    def _publish(self, price: float) -> None:
+        with self._cond:
+            self.price = price
+            self.ts = time.monotonic()
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        sub = orjson.dumps({
+            "type": "subscribe",
+            "product_ids": [self.symbol],
+            "channels": ["ticker"],
+        }).decode()
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=10) as ws:
+                    self._ws = ws
+                    ws.send(sub)
+                    backoff = 1.0
+                    for raw in ws:
+                        msg = orjson.loads(raw)
+                        if msg.get("type") == "ticker" and "price" in msg:
+                            self._publish(float(msg["price"]))
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"\n[stream error] {e!r} | reconnect in {backoff:.0f}s")
+            finally:
+                self._ws = None
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
@@ -1,7 +1,6 @@
 # risk.py
 from __future__ import annotations
 import time
-import datetime as dt
 from typing import Tuple, Optional
 
 class Risk:
@@ -18,7 +17,7 @@ class Risk:
         self.cooldown = int(cooldown)
         self.trail_pct = float(trail_pct)  # PERCENT
         # runtime state
-        self._day_utc: Optional[dt.date] = None
+        self._day_ord: Optional[int] = None  # days since epoch, UTC
         self._spent: float = 0.0          # USD spent on BUYs today
         self._last_buy_ts_wallclock: float = 0.0
         self._cooldown_deadline_mono: Optional[float] = None
@@ -27,9 +26,9 @@ class Risk:
 
     # ---- internals ----
     def _roll_day_if_needed(self) -> None:
-        today = dt.datetime.utcnow().date()
-        if self._day_utc != today:
-            self._day_utc = today
+        today = int(time.time()) // 86400
+        if self._day_ord != today:
+            self._day_ord = today
             self._spent = 0.0
 
     # ---- public API (backward compatible) ----
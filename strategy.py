@@ -2,34 +2,156 @@
 from __future__ import annotations
 from collections import deque
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Optional, Dict, Any
 
+from _njit import njit, HAVE_NUMBA
+
+# -------- Signal codes --------
+class Signal(IntEnum):
+    HOLD = 0
+    BUY = 1
+    SELL = 2
+
+_SIG_MAP = {
+    None: Signal.HOLD,
+    "buy": Signal.BUY, "bull": Signal.BUY,
+    "sell": Signal.SELL, "bear": Signal.SELL,
+    Signal.HOLD: Signal.HOLD, Signal.BUY: Signal.BUY, Signal.SELL: Signal.SELL,
+}
+
+# for logging / display; strategies themselves return Signal codes
+SIGNAL_NAMES = {Signal.HOLD: None, Signal.BUY: "buy", Signal.SELL: "sell"}
+
+def as_signal(sig) -> Signal:
+    """Normalize a strategy result (str, dict payload, Signal or None) to a Signal."""
+    if isinstance(sig, dict):
+        sig = sig.get("signal")
+    return _SIG_MAP.get(sig, Signal.HOLD)
+
+# -------- Batch kernels (backtest paths) --------
+# These replay the streaming arithmetic in the same order so backtest() signals
+# match update() exactly, ties included; a cumsum-difference mean does not.
+@njit(cache=True)
+def _rolling_sum_kernel(x, w, out):
+    # running window sum as the update() methods keep it: evict, then add
+    total = 0.0
+    for i in range(w):
+        total += x[i]
+    out[0] = total
+    for i in range(w, len(x)):
+        total -= x[i - w]
+        total += x[i]
+        out[i - w + 1] = total
+
+@njit(cache=True)
+def _wilder_kernel(x, w, out):
+    # same arithmetic, in the same order, as RSICalc.update, so batch and streaming agree
+    inv_w = 1.0 / w
+    keep = float(w - 1)
+    avg = 0.0
+    for i in range(w):
+        avg += x[i]
+    avg *= inv_w
+    out[0] = avg
+    for i in range(w, len(x)):
+        avg = (avg * keep + x[i]) * inv_w
+        out[i - w + 1] = avg
+
+def _run_kernel(kernel, x, w):
+    """Run a window kernel over ndarray x; returns len(x) - w + 1 values."""
+    import numpy as np
+    if HAVE_NUMBA:
+        out = np.empty(x.size - w + 1)
+        kernel(x, w, out)
+        return out
+    # without the JIT, plain floats are much cheaper to index than ndarrays
+    out = [0.0] * (x.size - w + 1)
+    kernel(x.tolist(), w, out)
+    return np.asarray(out)
+
+def _rolling_max(x, w):
+    """max(x[max(0, i-w+1)..i]) for every i, in O(log w) numpy passes."""
+    import numpy as np
+    w = min(w, x.size)
+    cur = x.copy()  # invariant: cur[i] = max of the last `span` values up to i
+    span = 1
+    while span * 2 <= w:
+        cur[span:] = np.maximum(cur[span:], cur[:-span])
+        span *= 2
+    rest = w - span
+    if rest > 0:
+        cur[rest:] = np.maximum(cur[rest:], cur[:-rest])
+    return cur
+
 # -------- Simple SMA crossover (utility / baseline) --------
+# Means within this relative distance count as tied (short on top). Running
+# sums drift from a fresh sum() in the last few bits, and with quantized
+# prices exact ties are common, so without the slack a tie would round
+# either way depending on summation order. Well above the drift, well below
+# the smallest real gap between two cent-quantized window means.
+_TIE_FLOOR = 1.0 - 1e-12
+
 class SMAStrategy:
+    # fixed attribute set: slot loads are cheaper than instance-dict lookups per tick
+    __slots__ = ("short", "long", "s", "l", "_inv_s", "_inv_l", "_s_sum", "_l_sum", "_prev_cross")
+
     def __init__(self, short: int = 5, long: int = 20):
         if short >= long:
             raise ValueError("short must be < long")
+        self.short = short
+        self.long = long
         self.s = deque(maxlen=short)
         self.l = deque(maxlen=long)
+        self._inv_s = 1.0 / short  # multiply instead of dividing per tick
+        self._inv_l = 1.0 / long
+        self._s_sum = 0.0          # running sums of the two windows
+        self._l_sum = 0.0
         self._prev_cross: Optional[int] = None  # -1 below, +1 above
 
-    def update(self, price: float) -> Optional[str]:
-        self.s.append(price); self.l.append(price)
-        if len(self.l) < self.l.maxlen:
-            return None
-        sp = sum(self.s) / len(self.s)
-        lp = sum(self.l) / len(self.l)
-        cross = 1 if sp >= lp else -1
-        if self._prev_cross is None:
-            self._prev_cross = cross
-            return None
-        signal = None
-        if self._prev_cross == -1 and cross == 1:
-            signal = "buy"
-        elif self._prev_cross == 1 and cross == -1:
-            signal = "sell"
+    def update(self, price: float, ts=None) -> Signal:
+        # ts is accepted so callers can drive either strategy alike; the SMA doesn't need it
+        s, l = self.s, self.l
+        s_sum, l_sum = self._s_sum, self._l_sum
+        if len(s) == self.short:
+            s_sum -= s[0]
+        if len(l) == self.long:
+            l_sum -= l[0]
+        s.append(price); l.append(price)
+        s_sum += price; l_sum += price
+        self._s_sum, self._l_sum = s_sum, l_sum
+        if len(l) < self.long:
+            return Signal.HOLD
+        cross = 1 if s_sum * self._inv_s >= l_sum * self._inv_l * _TIE_FLOOR else -1
+        prev = self._prev_cross
         self._prev_cross = cross
-        return signal
+        if prev == -1 and cross == 1:
+            return Signal.BUY
+        if prev == 1 and cross == -1:
+            return Signal.SELL
+        return Signal.HOLD
+
+    @classmethod
+    def backtest(cls, short: int, long: int, prices):
+        """
+        Vectorized replay of update() over a whole price series (needs numpy).
+        Returns an int8 array of Signal codes, one per input price.
+        """
+        import numpy as np
+
+        if short >= long:
+            raise ValueError("short must be < long")
+        px = np.asarray(prices, dtype=np.float64)
+        out = np.zeros(px.size, dtype=np.int8)
+        if px.size < long:
+            return out
+        # both means for every tick from the first full long window on
+        sp = _run_kernel(_rolling_sum_kernel, px, short)[long - short:] * (1.0 / short)
+        lp = _run_kernel(_rolling_sum_kernel, px, long) * (1.0 / long)
+        cross = np.where(sp >= lp * _TIE_FLOOR, 1, -1)
+        flips = np.flatnonzero(cross[1:] != cross[:-1]) + 1
+        out[flips + long - 1] = np.where(cross[flips] == 1, Signal.BUY, Signal.SELL)
+        return out
 
 # -------- RSI (Wilder) --------
 class RSICalc:
@@ -38,8 +160,11 @@ class RSICalc:
             raise ValueError("window must be > 0")
         self.window = window
         self.prev: Optional[float] = None
-        self.gains: deque = deque()
-        self.losses: deque = deque()
+        self.count = 0          # deltas seen, capped at window
+        self._inv_w = 1.0 / window
+        self._keep = float(window - 1)
+        self.avg_gain = 0.0     # plain sums until the first window fills
+        self.avg_loss = 0.0
 
     def update(self, price: float) -> Optional[float]:
         if self.prev is None:
@@ -47,14 +172,25 @@ class RSICalc:
             return None
         delta = price - self.prev
         self.prev = price
-        self.gains.append(max(delta, 0.0))
-        self.losses.append(abs(min(delta, 0.0)))
-        if len(self.gains) > self.window:
-            self.gains.popleft(); self.losses.popleft()
-        if len(self.gains) < self.window:
-            return None
-        avg_gain = sum(self.gains) / self.window
-        avg_loss = sum(self.losses) / self.window
+        return self._step(delta, abs(delta))
+
+    def _step(self, delta: float, mag: float) -> Optional[float]:
+        # update() minus the prev-price bookkeeping; SwingWithTrend feeds it directly
+        gain = (delta + mag) * 0.5   # == max(delta, 0), exactly
+        loss = (mag - delta) * 0.5   # == -min(delta, 0)
+        w = self.window
+        if self.count < w:
+            # seed with the simple mean of the first window
+            self.avg_gain += gain; self.avg_loss += loss
+            self.count += 1
+            if self.count < w:
+                return None
+            self.avg_gain *= self._inv_w; self.avg_loss *= self._inv_w
+        else:
+            # Wilder smoothing
+            self.avg_gain = (self.avg_gain * self._keep + gain) * self._inv_w
+            self.avg_loss = (self.avg_loss * self._keep + loss) * self._inv_w
+        avg_gain, avg_loss = self.avg_gain, self.avg_loss
         if avg_loss == 0:
             return 100.0
         rs = avg_gain / avg_loss
@@ -72,16 +208,75 @@ class ATRLite:
         self.window = window
         self.prev: Optional[float] = None
         self.moves: deque = deque(maxlen=window)
+        self._move_sum = 0.0
+        self._inv_w = 1.0 / window
 
     def update(self, price: float) -> Optional[float]:
         if self.prev is None:
             self.prev = price
             return None
-        self.moves.append(abs(price - self.prev))
+        move = abs(price - self.prev)
         self.prev = price
+        return self._step(move)
+
+    def _step(self, move: float) -> Optional[float]:
+        if len(self.moves) == self.window:
+            self._move_sum -= self.moves[0]
+        self.moves.append(move)
+        self._move_sum += move
         if len(self.moves) < self.window:
             return None
-        return sum(self.moves) / len(self.moves)
+        return self._move_sum * self._inv_w
+
+# -------- Shared indicators --------
+class _SharedIndicator:
+    # one indicator stepped at most once per tick timestamp; later callers get the cached value
+    __slots__ = ("ind", "ts", "price", "value", "_fn")
+
+    def __init__(self, ind):
+        self.ind = ind
+        self.ts = None       # timestamp of the last step
+        self.price = None    # price seen at that step
+        self.value = None
+        self._fn = ind._step if isinstance(ind, RSICalc) else (lambda delta, mag: ind._step(mag))
+
+    def step(self, prev_ts, ts, price: float, delta: float, mag: float) -> Optional[float]:
+        if ts == self.ts:
+            if price != self.price:
+                raise ValueError(f"shared indicator got two prices for ts={ts!r}; are the strategies on different feeds?")
+            return self.value
+        if self.ts is not None and prev_ts != self.ts:
+            # the caller's delta spans different ticks than the indicator has seen
+            raise ValueError(f"strategy stepped ts={ts!r} from ts={prev_ts!r}, but the shared indicator is at ts={self.ts!r}")
+        self.ts, self.price = ts, price
+        self.value = self._fn(delta, mag)
+        return self.value
+
+class IndicatorCache:
+    """
+    Lets several strategies on the same feed share one RSI/ATR per window
+    instead of each recomputing identical values.
+    Indicators are keyed by (class, window, feed, stream): feed names the
+    price source (e.g. the symbol) and stream the tick sequence within it
+    (SwingWithTrend passes its threshold_abs, which decides the kept ticks).
+    Each indicator steps once per tick timestamp; a strategy whose ticks
+    don't line up with the others' gets a ValueError instead of bad values.
+    """
+    def __init__(self):
+        self._shared: Dict[tuple, _SharedIndicator] = {}
+
+    def _get(self, cls, window: int, feed, stream) -> _SharedIndicator:
+        key = (cls, window, feed, stream)
+        sh = self._shared.get(key)
+        if sh is None:
+            sh = self._shared[key] = _SharedIndicator(cls(window))
+        return sh
+
+    def get_rsi(self, window: int, feed=None, stream=None) -> _SharedIndicator:
+        return self._get(RSICalc, window, feed, stream)
+
+    def get_atr(self, window: int, feed=None, stream=None) -> _SharedIndicator:
+        return self._get(ATRLite, window, feed, stream)
 
 # -------- Swing-with-Trend --------
 @dataclass
@@ -98,67 +293,128 @@ class SwingConfig:
     atr_cap_pct: float = 5.0     # trade disabled if ATR% > this (percent of price)
     threshold_abs: float = 0.0   # ignore ticks smaller than this absolute change
     trail_pct: Optional[float] = None  # track high-water and block sells below (percent drop)
+    # high-water over the last N trail checks (None = all-time); warm-up ticks
+    # and ticks the ATR gate rejects never reach the check and are not counted
+    trail_lookback: Optional[int] = None
 
 class SwingWithTrend:
     """
     Mean-reversion around a trend SMA, gated by RSI and ATR (both optional).
-    Emits dicts like: {"signal":"buy","reason":"below_band","sma":..., "rsi":..., "atr_pct":..., "dev_pct":...}
+    update() returns a Signal like SMAStrategy's; for each BUY/SELL, self.info
+    holds the details: {"reason":"below_band","sma":..., "rsi":..., "atr_pct":..., "dev_pct":...}
+    Pass an IndicatorCache (and the feed it reads, e.g. the symbol) to share
+    RSI/ATR with other instances on that feed; update() then needs each
+    tick's ts, the same value for every instance.
     """
-    def __init__(self, cfg: SwingConfig):
+    def __init__(self, cfg: SwingConfig, cache: Optional[IndicatorCache] = None, feed=None):
         if cfg.trend_window <= 1:
             raise ValueError("trend_window must be > 1")
         self.cfg = cfg
         self.prices = deque(maxlen=cfg.trend_window)
-        self.rsi = RSICalc(cfg.rsi_window) if cfg.enable_rsi else None
-        self.atr = ATRLite(cfg.atr_window) if cfg.enable_atr else None
+        self._trend_sum = 0.0
+        self._inv_trend = 1.0 / cfg.trend_window
+        self._warm = False  # set once the trend window has filled
+        self._cache = cache
+        self._prev_ts = None  # ts of the last kept tick; shared indicators check it
+        if cache is None:
+            self._rsi_sh = self._atr_sh = None
+            self.rsi = RSICalc(cfg.rsi_window) if cfg.enable_rsi else None
+            self.atr = ATRLite(cfg.atr_window) if cfg.enable_atr else None
+        else:
+            self._rsi_sh = cache.get_rsi(cfg.rsi_window, feed, cfg.threshold_abs) if cfg.enable_rsi else None
+            self._atr_sh = cache.get_atr(cfg.atr_window, feed, cfg.threshold_abs) if cfg.enable_atr else None
+            self.rsi = self._rsi_sh.ind if self._rsi_sh else None
+            self.atr = self._atr_sh.ind if self._atr_sh else None
         self.prev_price: Optional[float] = None
         self.high_water: Optional[float] = None  # for optional trailing logic
+        self.info: Optional[Dict[str, Any]] = None  # details of the last BUY/SELL returned
+        # cfg is fixed for the strategy's lifetime; hoist what update() compares against
+        self._threshold = float(cfg.threshold_abs)
+        self._buy_band = -float(cfg.buy_pct)
+        self._sell_band = float(cfg.sell_pct)
+        self._atr_cap = float(cfg.atr_cap_pct)
+        self._trail_mul = (1.0 - cfg.trail_pct / 100.0) if cfg.trail_pct is not None else None
+        if cfg.trail_lookback is not None and cfg.trail_lookback < 1:
+            raise ValueError("trail_lookback must be >= 1")
+        # monotonic deque of (tick, price), prices strictly decreasing: front is the window max
+        self._hw_dq: Optional[deque] = deque() if cfg.trail_lookback else None
+        self._hw_tick = 0
 
     def _trend_sma(self) -> Optional[float]:
-        if len(self.prices) < self.prices.maxlen:
+        if not self._warm:
             return None
-        return sum(self.prices) / len(self.prices)
+        return self._trend_sum * self._inv_trend
 
-    def update(self, price: float) -> Optional[Dict[str, Any]]:
+    def update(self, price: float, ts=None) -> Signal:
         # threshold filter on raw ticks
-        if self.prev_price is not None and self.cfg.threshold_abs > 0:
-            if abs(price - self.prev_price) < self.cfg.threshold_abs:
-                return None
+        prev = self.prev_price
+        if prev is not None and self._threshold > 0:
+            if abs(price - prev) < self._threshold:
+                return Signal.HOLD
         self.prev_price = price
+        prev_ts, self._prev_ts = self._prev_ts, ts
+
+        if self._warm:
+            self._trend_sum -= self.prices[0]
+            self.prices.append(price)
+            self._trend_sum += price
+        else:
+            self.prices.append(price)
+            self._trend_sum += price
+            self._warm = len(self.prices) == self.prices.maxlen
+
+        # one delta feeds both gates (close-only data: the ATR move is |delta|)
+        rsi_val = atr_val = None
+        if prev is not None:
+            delta = price - prev
+            mag = abs(delta)
+            if self._cache is None:
+                if self.rsi: rsi_val = self.rsi._step(delta, mag)
+                if self.atr: atr_val = self.atr._step(mag)
+            else:
+                if ts is None:
+                    raise ValueError("update() needs ts when indicators are shared through an IndicatorCache")
+                if self._rsi_sh: rsi_val = self._rsi_sh.step(prev_ts, ts, price, delta, mag)
+                if self._atr_sh: atr_val = self._atr_sh.step(prev_ts, ts, price, delta, mag)
 
-        self.prices.append(price)
         sma = self._trend_sma()
         if sma is None or sma <= 0:
-            # Warm-up
-            if self.rsi: self.rsi.update(price)
-            if self.atr: self.atr.update(price)
-            return None
+            return Signal.HOLD  # warm-up
 
         # deviation from SMA in percent
         dev_pct = (price / sma - 1.0) * 100.0
 
         # optional RSI/ATR gates
-        rsi_val = self.rsi.update(price) if self.rsi else None
-        atr_val = self.atr.update(price) if self.atr else None
         atr_pct = (atr_val / price * 100.0) if (atr_val is not None and price > 0) else None
 
-        if self.cfg.enable_atr and (atr_pct is None or atr_pct > self.cfg.atr_cap_pct):
-            return None  # too volatile (or not enough ATR yet)
+        if self.atr and (atr_pct is None or atr_pct > self._atr_cap):
+            return Signal.HOLD  # too volatile (or not enough ATR yet)
 
         # Trailing high-water (sell guard), if configured
-        if self.cfg.trail_pct is not None:
-            if self.high_water is None or price > self.high_water:
-                self.high_water = price
+        if self._trail_mul is not None:
+            dq = self._hw_dq
+            if dq is None:
+                if self.high_water is None or price > self.high_water:
+                    self.high_water = price
+            else:
+                self._hw_tick += 1
+                while dq and dq[-1][1] <= price:
+                    dq.pop()
+                dq.append((self._hw_tick, price))
+                if dq[0][0] <= self._hw_tick - self.cfg.trail_lookback:
+                    dq.popleft()
+                self.high_water = dq[0][1]
             # If price drops more than trail_pct from high_water, prefer sell
-            if self.high_water and price <= self.high_water * (1.0 - self.cfg.trail_pct / 100.0):
-                return {"signal": "sell", "reason": "trail_stop", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+            if self.high_water and price <= self.high_water * self._trail_mul:
+                self.info = {"reason": "trail_stop", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+                return Signal.SELL
 
         # Core swing logic around SMA bands
-        want_buy = dev_pct <= -float(self.cfg.buy_pct)
-        want_sell = dev_pct >=  float(self.cfg.sell_pct)
+        want_buy = dev_pct <= self._buy_band
+        want_sell = dev_pct >= self._sell_band
 
-        # Apply RSI gates if enabled
-        if self.cfg.enable_rsi and rsi_val is not None:
+        # Apply RSI gates if enabled (rsi_val is only set when RSI is enabled)
+        if rsi_val is not None:
             if want_buy and not (rsi_val <= self.cfg.rsi_buy):
                 want_buy = False
             if want_sell and not (rsi_val >= self.cfg.rsi_sell):
@@ -166,8 +422,98 @@ class SwingWithTrend:
 
         # Prefer sell over buy if both somehow true
         if want_sell:
-            return {"signal": "sell", "reason": "above_band", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+            self.info = {"reason": "above_band", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+            return Signal.SELL
         if want_buy:
-            return {"signal": "buy", "reason": "below_band", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+            self.info = {"reason": "below_band", "sma": sma, "rsi": rsi_val, "atr_pct": atr_pct, "dev_pct": dev_pct}
+            return Signal.BUY
+
+        return Signal.HOLD
+
+    @classmethod
+    def backtest(cls, cfg: SwingConfig, prices):
+        """
+        Vectorized replay of update() over a whole price series (needs numpy).
+        Returns an int8 array holding the Signal update() would return for
+        each input price.
+        """
+        import numpy as np
+
+        px = np.asarray(prices, dtype=np.float64)
+        n = px.size
+        out = np.zeros(n, dtype=np.int8)
+        if n == 0:
+            return out
+
+        # threshold filter is path-dependent (prev_price only moves on kept ticks)
+        idx = np.arange(n)
+        if cfg.threshold_abs > 0:
+            keep = np.zeros(n, dtype=bool)
+            prev = None
+            for i, v in enumerate(px.tolist()):
+                if prev is None or abs(v - prev) >= cfg.threshold_abs:
+                    keep[i] = True
+                    prev = v
+            idx = np.flatnonzero(keep)
+            px = px[idx]
+            n = px.size
+
+        def rolling_mean(x, w, offset):
+            # mean of x[i-w+1..i], aligned so result[j] belongs to tick j+offset; NaN until full
+            res = np.full(n, np.nan)
+            if x.size >= w:
+                res[w - 1 + offset:] = _run_kernel(_rolling_sum_kernel, x, w) * (1.0 / w)
+            return res
+
+        def wilder(x, w):
+            # RSICalc's smoothing, aligned like rolling_mean(x, w, 1)
+            res = np.full(n, np.nan)
+            if x.size >= w:
+                res[w:] = _run_kernel(_wilder_kernel, x, w)
+            return res
+
+        sma = rolling_mean(px, cfg.trend_window, 0)
+        diff = np.diff(px)
+
+        rsi = np.full(n, np.nan)
+        if cfg.enable_rsi:
+            avg_gain = wilder(np.clip(diff, 0.0, None), cfg.rsi_window)
+            avg_loss = wilder(-np.clip(diff, None, 0.0), cfg.rsi_window)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            rsi[avg_loss == 0] = 100.0
+            rsi[np.isnan(avg_gain)] = np.nan
+
+        live = ~np.isnan(sma) & (sma > 0)
+        with np.errstate(invalid="ignore"):
+            dev_pct = (px / sma - 1.0) * 100.0
+            if cfg.enable_atr:
+                atr_pct = rolling_mean(np.abs(diff), cfg.atr_window, 1) / px * 100.0
+                live &= (px > 0) & (atr_pct <= cfg.atr_cap_pct)
+
+        sell = np.zeros(n, dtype=bool)
+        buy = np.zeros(n, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            want_buy = dev_pct <= -float(cfg.buy_pct)
+            want_sell = dev_pct >= float(cfg.sell_pct)
+            if cfg.enable_rsi:
+                gated = ~np.isnan(rsi)
+                want_buy &= ~gated | (rsi <= cfg.rsi_buy)
+                want_sell &= ~gated | (rsi >= cfg.rsi_sell)
+
+        if cfg.trail_pct is not None:
+            # high-water only advances on ticks that got past the ATR gate
+            if cfg.trail_lookback:
+                # rolling max over the last N live ticks, scattered back to their positions
+                hw = np.full(n, -np.inf)
+                live_idx = np.flatnonzero(live)
+                hw[live_idx] = _rolling_max(px[live_idx], cfg.trail_lookback)
+            else:
+                hw = np.maximum.accumulate(np.where(live, px, -np.inf))
+            sell |= live & (hw != 0) & (px <= hw * (1.0 - cfg.trail_pct / 100.0))
 
-        return None
+        sell |= live & want_sell
+        buy |= live & want_buy & ~sell
+        out[idx[sell]] = Signal.SELL
+        out[idx[buy]] = Signal.BUY
+        return out
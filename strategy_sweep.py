@@ -0,0 +1,88 @@
+# strategy_sweep.py
+from __future__ import annotations
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from strategy import SMAStrategy, SwingWithTrend, SwingConfig, Signal
+
+# strategy name (as on the sma-bot command line) -> vectorized backtest
+_BACKTESTS = {
+    "sma": lambda p, px: SMAStrategy.backtest(p["short"], p["long"], px),
+    "swingT": lambda p, px: SwingWithTrend.backtest(SwingConfig(**p), px),
+}
+
+def _valid_swing(p: Dict[str, Any]) -> bool:
+    lookback = p.get("trail_lookback")
+    return (p["trend_window"] > 1 and p.get("rsi_window", 14) > 0
+            and p.get("atr_window", 14) > 0 and (lookback is None or lookback >= 1))
+
+# grid combinations the strategy constructor would reject; skipped, not run
+_VALID = {
+    "sma": lambda p: 0 < p["short"] < p["long"],
+    "swingT": _valid_swing,
+}
+
+def _score(px: np.ndarray, sig: np.ndarray) -> Dict[str, Any]:
+    # long-only replay: BUY opens when flat, SELL closes when long
+    ret = 1.0
+    entry = None
+    trades = 0
+    for i in np.flatnonzero(sig).tolist():
+        if entry is None and sig[i] == Signal.BUY:
+            entry = px[i]
+        elif entry is not None and sig[i] == Signal.SELL:
+            ret *= px[i] / entry
+            entry = None
+            trades += 1
+    return {"trades": trades, "return_pct": round(float(ret - 1.0) * 100.0, 4)}
+
+def _run_one(strategy: str, params: Dict[str, Any], shm_name: str, shape, dtype) -> Dict[str, Any]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        px = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        try:
+            res = _score(px, _BACKTESTS[strategy](params, px))
+        finally:
+            del px  # release the view before closing the segment
+    finally:
+        shm.close()
+    res["params"] = params
+    return res
+
+def expand_grid(param_grid: Dict[str, Iterable]) -> List[Dict[str, Any]]:
+    keys = list(param_grid)
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(param_grid[k] for k in keys))]
+
+def sweep(prices, strategy: str, param_grid: Dict[str, Iterable], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Backtest every combination in param_grid across a process pool.
+    The price series is placed in shared memory once, so workers map it
+    instead of each receiving a pickled copy.
+    Combinations the strategy would reject (e.g. short >= long) are
+    skipped; any error raised while backtesting the rest propagates.
+    Returns one {"params", "trades", "return_pct"} dict per valid
+    combination, best return first.
+    """
+    if strategy not in _BACKTESTS:
+        raise ValueError(f"unknown strategy {strategy!r}; expected one of {sorted(_BACKTESTS)}")
+    valid = _VALID[strategy]
+    combos = [params for params in expand_grid(param_grid) if valid(params)]
+    px = np.ascontiguousarray(prices, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(px.nbytes, 1))
+    try:
+        np.ndarray(px.shape, dtype=px.dtype, buffer=shm.buf)[:] = px
+        results = []
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futs = [pool.submit(_run_one, strategy, params, shm.name, px.shape, px.dtype.str)
+                    for params in combos]
+            for fut in as_completed(futs):
+                results.append(fut.result())
+    finally:
+        shm.close()
+        shm.unlink()
+    results.sort(key=lambda r: r["return_pct"], reverse=True)
+    return results
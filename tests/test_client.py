@@ -0,0 +1,92 @@
+# tests/test_client.py
+import base64
+import json
+import sys
+import threading
+
+import pytest
+from nacl.signing import SigningKey
+
+import client
+from client import ORDERS, RH
+
+SEED = bytes(range(32))
+API_KEY = "rh-test-key"
+
+
+def _baseline_sig(ts: str, path: str, method: str, body) -> str:
+    # the original PyNaCl signer, message built as one str
+    canon = json.dumps(body, separators=(",", ":"), sort_keys=True) if body else ""
+    msg = f"{API_KEY}{ts}{path}{method.upper()}{canon}"
+    return base64.b64encode(SigningKey(SEED).sign(msg.encode()).signature).decode()
+
+
+@pytest.fixture
+def rh():
+    return RH(api_key=API_KEY, priv_b64=base64.b64encode(SEED).decode(), dry_run="true")
+
+
+@pytest.mark.parametrize("now", [1700000000.7, 1700000001.2, 999999999.0])
+@pytest.mark.parametrize("path", [ORDERS, f"{ORDERS}abc-123/"])
+def test_get_signature_matches_pynacl(monkeypatch, rh, now, path):
+    monkeypatch.setattr(client.time, "time", lambda: now)
+    hdr = rh._headers("GET", path, None)
+    ts = str(int(now))
+    assert hdr["x-timestamp"] == ts
+    assert hdr["x-signature"] == _baseline_sig(ts, path, "GET", None)
+
+
+def test_get_template_is_reused_across_timestamps(monkeypatch, rh):
+    for now in (1700000000.0, 1700000099.0, 1700000000.0):
+        monkeypatch.setattr(client.time, "time", lambda: now)
+        assert rh._headers("GET", ORDERS, None)["x-signature"] == _baseline_sig(str(int(now)), ORDERS, "GET", None)
+
+
+def test_get_signing_is_safe_across_threads(rh):
+    # the bot signs GETs on its main loop and on the fill thread at once
+    stamps = {0: "1700000000", 1: "1700000777"}
+    bad = []
+    start = threading.Barrier(2)
+
+    def sign(k):
+        ts = stamps[k]
+        want = _baseline_sig(ts, ORDERS, "GET", None)
+        start.wait()
+        for _ in range(2000):
+            if rh._sign_get(ORDERS, ts) != want:
+                bad.append(ts)
+
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=sign, args=(k,)) for k in stamps]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(old)
+    assert not bad
+    assert isinstance(rh._get_bufs[ORDERS], bytes)  # shared template is never written
+
+
+@pytest.mark.parametrize("kw", [
+    {"quantity": 12.5},
+    {"usd_notional": 0.05},
+    {"quantity": 1e-08},
+])
+def test_post_signature_and_payload_match_pynacl(monkeypatch, rh, kw):
+    monkeypatch.setattr(client.time, "time", lambda: 1700000000.0)
+    body = RH._order_body("DOGE-USD", "buy", client_order_id="0123abcd", **kw)
+    method, url, hdr, payload = rh._build("POST", ORDERS, body)
+    assert (method, url) == ("POST", client.BASE + ORDERS)
+    assert hdr["x-signature"] == _baseline_sig("1700000000", ORDERS, "POST", body)
+    # the bytes sent are the bytes signed
+    assert payload == json.dumps(body, separators=(",", ":"), sort_keys=True).encode()
+
+
+def test_accepts_a_64_byte_nacl_secret_key(monkeypatch):
+    monkeypatch.setattr(client.time, "time", lambda: 1700000000.0)
+    sk64 = bytes(SigningKey(SEED)._signing_key)  # seed followed by the public key
+    rh = RH(api_key=API_KEY, priv_b64=base64.b64encode(sk64).decode(), dry_run="true")
+    assert rh._headers("GET", ORDERS, None)["x-signature"] == _baseline_sig("1700000000", ORDERS, "GET", None)
@@ -0,0 +1,112 @@
+# tests/test_feed.py
+import time
+
+import pytest
+
+import feed
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(feed, "_PRICE_CACHE", {})
+    monkeypatch.setattr(feed, "_LAST_PRICE", {})
+    monkeypatch.setattr(feed, "_PREV_PRICE", {})
+    monkeypatch.setattr(feed, "SHOW_TICKS", False)
+    return now
+
+
+def _counting(prices):
+    calls = []
+    it = iter(prices)
+
+    def fetch(symbol):
+        calls.append(symbol)
+        return next(it)
+    return fetch, calls
+
+
+def test_get_price_serves_quotes_younger_than_the_ttl(monkeypatch, clock):
+    fetch, calls = _counting([1.0, 2.0, 3.0])
+    monkeypatch.setattr(feed, "_fetch_coinbase", fetch)
+    assert feed.get_price("DOGE-USD") == 1.0
+    clock[0] += feed.CACHE_TTL * 0.9
+    assert feed.get_price("DOGE-USD") == 1.0
+    assert feed.get_price("DOGE-USD", side="buy") == pytest.approx(1.005)  # bias on the cached quote
+    assert len(calls) == 1
+    clock[0] += feed.CACHE_TTL * 0.2
+    assert feed.get_price("DOGE-USD") == 2.0
+    assert feed.get_price("DOGE-USD", cache_ttl=0) == 3.0
+    assert len(calls) == 3
+
+
+def test_coinbase_spot_ttl_and_bypass(monkeypatch, clock):
+    fetch, calls = _counting([1.0, 2.0, 3.0])
+    monkeypatch.setattr(feed, "_race", lambda sources, symbol: ("Test", fetch(symbol)))
+    assert feed.coinbase_spot("BTC-USD") == 1.0
+    assert feed.coinbase_spot("BTC-USD") == 1.0
+    assert feed.coinbase_spot("ETH-USD") == 2.0  # cached per symbol
+    assert feed.coinbase_spot("BTC-USD", cache_ttl=0) == 3.0
+    assert calls == ["BTC-USD", "ETH-USD", "BTC-USD"]
+
+
+class _Resp:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def _kraken_session(monkeypatch, body: bytes):
+    urls = []
+
+    def get(url, timeout=None):
+        urls.append(url)
+        return _Resp(body)
+    monkeypatch.setattr(feed._SESSION, "get", get)
+    return urls
+
+
+_KRAKEN_BODY = (b'{"error":[],"result":{'
+                b'"XXBTZUSD":{"c":["65000.10000","0.01"]},'
+                b'"XETHZUSD":{"c":["3100.25000","0.5"]},'
+                b'"XDGUSD":{"c":["0.1234567","100"]}}}')
+
+
+def test_kraken_multi_maps_legacy_keys_back_to_symbols(monkeypatch):
+    urls = _kraken_session(monkeypatch, _KRAKEN_BODY)
+    got = feed._fetch_kraken_multi(["BTC-USD", "ETH-USD", "DOGE-USD", "SHIB-USD"])
+    assert got == {"BTC-USD": 65000.1, "ETH-USD": 3100.25, "DOGE-USD": 0.1234567}
+    assert urls == ["https://api.kraken.com/0/public/Ticker?pair=XBTUSD,ETHUSD,XDGUSD,SHIBUSD"]
+
+
+def test_get_prices_fills_the_cache_from_one_request(monkeypatch, clock):
+    urls = _kraken_session(monkeypatch, _KRAKEN_BODY)
+    fetch, calls = _counting([0.00002])
+    monkeypatch.setattr(feed, "_fetch_coinbase", fetch)
+    syms = ["BTC-USD", "ETH-USD", "DOGE-USD", "SHIB-USD"]
+    got = feed.get_prices(syms)
+    assert got == {"BTC-USD": 65000.1, "ETH-USD": 3100.25, "DOGE-USD": 0.1234567, "SHIB-USD": 0.00002}
+    assert len(urls) == 1 and calls == ["SHIB-USD"]  # Kraken skipped SHIB: per-symbol fallback
+    assert set(feed._PRICE_CACHE) == set(syms)
+    assert feed.get_prices(syms) == got  # inside the TTL: served from memory
+    assert len(urls) == 1 and len(calls) == 1
+
+
+def test_spot_many_fetches_concurrently_and_backfills_from_kraken(monkeypatch, clock):
+    quotes = {"BTC-USD": 65000.0, "DOGE-USD": 0.12}
+
+    def coinbase(symbol):
+        if symbol not in quotes:
+            raise RuntimeError("404")
+        return quotes[symbol]
+    monkeypatch.setattr(feed, "_fetch_coinbase", coinbase)
+    urls = _kraken_session(monkeypatch, _KRAKEN_BODY)
+    feed._PRICE_CACHE["SHIB-USD"] = (clock[0], 0.00002)  # fresh: no fetch at all
+
+    got = feed.spot_many(["BTC-USD", "DOGE-USD", "ETH-USD", "SHIB-USD"])
+    assert got == {"BTC-USD": 65000.0, "DOGE-USD": 0.12, "ETH-USD": 3100.25, "SHIB-USD": 0.00002}
+    assert urls == ["https://api.kraken.com/0/public/Ticker?pair=ETHUSD"]  # only the Coinbase failure
+    assert feed._LAST_PRICE["BTC-USD"] == 65000.0
@@ -0,0 +1,132 @@
+# tests/test_main.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import feed
+import main
+from strategy import Signal
+
+
+def _run_bot(monkeypatch, tmp_path, argv, prices, fetch_secs=0.05):
+    """
+    Drive cmd_sma_bot on a fake clock until every price has been polled.
+    Each quote fetch takes fetch_secs of simulated time; returns the prices
+    the strategy was fed, in order.
+    """
+    clock = [0.0]
+    quotes = iter(prices)
+    seen = []
+
+    def race(sources, symbol):
+        clock[0] += fetch_secs
+        return "Test", next(quotes)
+
+    def sleep(secs):
+        if len(seen) >= len(prices):
+            raise KeyboardInterrupt
+        clock[0] += secs
+
+    class Recorder:
+        def __init__(self, cfg, *args, **kwargs):
+            pass
+
+        def update(self, price, ts=None):
+            seen.append(price)
+            return Signal.HOLD
+
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+    monkeypatch.setattr(feed, "_race", race)
+    monkeypatch.setattr(feed, "_PRICE_CACHE", {})
+    monkeypatch.setattr(feed, "_PREV_PRICE", {})
+    monkeypatch.setattr(main, "SwingWithTrend", Recorder)
+    monkeypatch.setattr(main, "get_rh", lambda: SimpleNamespace(market_order=None))
+    monkeypatch.chdir(tmp_path)
+    args = main.build().parse_args(["sma-bot", "--strategy", "swingT", "--quiet", *argv])
+    main.cmd_sma_bot(args)
+    return seen
+
+
+def test_poll_loop_at_cache_ttl_gets_fresh_quotes(monkeypatch, tmp_path):
+    # --period equal to the quote cache TTL: every poll must still hit the feed
+    period = str(int(feed.CACHE_TTL))
+    prices = [101.0, 102.0, 103.0, 104.0, 105.0, 106.0]
+    assert _run_bot(monkeypatch, tmp_path, ["--period", period], prices) == prices
+
+
+def test_live_csv_row_is_fsynced_by_the_loop_tick(monkeypatch, tmp_path):
+    clock = [0.0]
+    synced = []
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(main.os, "fsync", synced.append)
+    monkeypatch.setattr(main, "_LIVE_CSV", {})
+    path = str(tmp_path / "live_trades.csv")
+
+    main.append_live_csv(path, {"symbol": "DOGE-USD", "side": "buy"})
+    main.maybe_fsync_live_csv()
+    assert synced == []  # inside the window: left in the page cache
+
+    clock[0] += main.LIVE_FSYNC_SECS
+    main.maybe_fsync_live_csv()
+    assert len(synced) == 1  # no second row needed to make the first durable
+    main.maybe_fsync_live_csv()
+    assert len(synced) == 1  # nothing new since
+    main._LIVE_CSV[path][0].close()
+
+
+def _write_trades(path, header, rows, newline="\n", trailing=True):
+    text = newline.join([header, *rows]) + (newline if trailing else "")
+    path.write_bytes(text.encode())
+
+
+def _both_readers(monkeypatch, path, symbol):
+    monkeypatch.setattr(main, "TAIL_MIN_BYTES", 1 << 62)
+    forward = main.load_last_trade(str(path), symbol)
+    monkeypatch.setattr(main, "TAIL_MIN_BYTES", 0)
+    tail = main.load_last_trade(str(path), symbol)
+    return forward, tail
+
+
+_PAPER_HEADER = "TS, SYMBOL, SIDE, QTY, PRICE, FEE, NOTIONAL, REALIZED_PNL, BALANCE"
+_LIVE_HEADER = ",".join(main.LIVE_KEYS)
+
+
+def _paper_rows(n):
+    syms = ["DOGE-USD", "BTC-USD", "SHIB-USD"]
+    return [f"{1700000000 + i}.5, {syms[i % 3]}, {'buy' if i % 2 else 'sell'}, {i}.0, 0.{i:04d}, 0.01, 1.0, 0.0, {1000 - i}.0"
+            for i in range(n)]
+
+
+def _live_rows(n):
+    rows = []
+    for i in range(n):
+        sym = "DOGE-USD" if i % 4 == 0 else "ETH-USD"
+        note = '"sold after DOGE-USD, dip"' if sym == "ETH-USD" and i % 3 == 0 else ""
+        rows.append(f"{1700000000 + i},{sym},buy,{i},0.25,2.5,id-{i},filled,{note}")
+    return rows
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("trailing", [True, False])
+@pytest.mark.parametrize("header,rows", [
+    (_PAPER_HEADER, _paper_rows(2000)),
+    (_LIVE_HEADER, _live_rows(2000)),
+    (_LIVE_HEADER, _live_rows(2000)[:1] + _live_rows(2000)[1::4][1:] + ["", ""]),
+])
+def test_tail_reader_matches_forward_scan(monkeypatch, tmp_path, newline, trailing, header, rows):
+    path = tmp_path / "trades.csv"
+    _write_trades(path, header, rows, newline, trailing)
+    for symbol in ("DOGE-USD", "doge-usd", "BTC-USD", "SHIB-USD", "ETH-USD", "XRP-USD"):
+        forward, tail = _both_readers(monkeypatch, path, symbol)
+        assert tail == forward, symbol
+
+
+def test_tail_reader_edge_files(monkeypatch, tmp_path):
+    path = tmp_path / "trades.csv"
+    for text in ("", _LIVE_HEADER, _LIVE_HEADER + "\n", _LIVE_HEADER + "\n" + _live_rows(1)[0]):
+        path.write_text(text)
+        forward, tail = _both_readers(monkeypatch, path, "DOGE-USD")
+        assert tail == forward
+    assert tail["order_id"] == "id-0"
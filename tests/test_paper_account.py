@@ -0,0 +1,77 @@
+# tests/test_paper_account.py
+import gc
+import time
+import weakref
+
+import paper_account
+from paper_account import PaperAccount
+
+
+def test_buffered_fill_is_flushed_by_the_loop_tick(monkeypatch, tmp_path):
+    clock = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    path = tmp_path / "paper.csv"
+    acct = PaperAccount(starting_usd=100.0)
+    acct.set_csv(str(path))
+    try:
+        acct.buy("DOGE-USD", 10.0, 0.25)
+        acct.maybe_flush_csv()
+        assert "DOGE-USD" not in path.read_text()  # row still buffered
+
+        clock[0] += paper_account.CSV_FLUSH_SECS + 0.1
+        acct.maybe_flush_csv()  # no second fill needed
+        lines = path.read_text().splitlines()
+        assert lines[0] + "\n" == paper_account._CSV_HEADER
+        assert len(lines) == 2 and ", DOGE-USD, buy, 10.0, 0.25," in lines[1]
+    finally:
+        acct.close_csv()
+
+
+def test_close_csv_releases_the_account(tmp_path):
+    acct = PaperAccount()
+    acct.set_csv(str(tmp_path / "a.csv"))
+    acct.set_csv(str(tmp_path / "b.csv"))  # reopen: still one exit hook
+    acct.close_csv()
+    ref = weakref.ref(acct)
+    del acct
+    gc.collect()
+    assert ref() is None
+
+
+def test_stats_and_equity_follow_the_live_state():
+    acct = PaperAccount(starting_usd=1000.0, fee_bps=0)
+    acct.buy("DOGE-USD", 100.0, 0.5)
+    s = acct.stats()
+    s["positions"].clear()
+    s["wins"] = 99
+    again = acct.stats()
+    assert again["wins"] == 0 and "DOGE-USD" in again["positions"]
+
+    assert acct.equity({"DOGE-USD": 1.0}) == 1050.0
+    acct.positions["DOGE-USD"].qty = 0.0  # edited directly, no fill
+    assert acct.equity({"DOGE-USD": 1.0}) == 950.0
+    assert acct.stats()["positions"]["DOGE-USD"]["qty"] == 0.0
+
+
+def _fresh_export(acct):
+    return paper_account._CSV_HEADER + "".join(acct._csv_row(rec) for rec in acct.history)
+
+
+def test_export_csv_tracks_truncated_and_replaced_history(tmp_path):
+    acct = PaperAccount(starting_usd=1000.0, fee_bps=0)
+    for px in (0.1, 0.2, 0.3):
+        acct.buy("DOGE-USD", 10.0, px)
+    path = tmp_path / "export.csv"
+    acct.export_csv(str(path))
+    assert path.read_text() == _fresh_export(acct)
+
+    del acct.history[1:]
+    acct.export_csv(str(path))
+    assert path.read_text() == _fresh_export(acct)
+
+    acct.buy("DOGE-USD", 10.0, 0.4)
+    acct.history[0] = acct.history[-1]
+    acct.history[-1].price = 0.45
+    acct.export_csv(str(path))
+    assert path.read_text() == _fresh_export(acct)
+    assert path.read_text().count(", 0.45, ") == 2
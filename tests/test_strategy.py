@@ -0,0 +1,227 @@
+# tests/test_strategy.py
+import random
+from collections import deque
+
+import pytest
+
+import strategy
+from strategy import SMAStrategy, Signal
+
+
+def _quantized_walk(seed, base, tick, n):
+    rng = random.Random(seed)
+    ticks = [round(base / tick)]
+    for _ in range(n):
+        ticks.append(ticks[-1] + rng.choice((-1, 0, 0, 1)))
+    return [t * tick for t in ticks], ticks
+
+
+def _crossings(crosses):
+    out, prev = [], None
+    for cross in crosses:
+        if cross is None or prev is None:
+            out.append(Signal.HOLD)
+        elif prev == -1 and cross == 1:
+            out.append(Signal.BUY)
+        elif prev == 1 and cross == -1:
+            out.append(Signal.SELL)
+        else:
+            out.append(Signal.HOLD)
+        if cross is not None:
+            prev = cross
+    return out
+
+
+def _sum_len_sma(short, long, prices):
+    # the original O(window) form: fresh sum()/len() every tick, same tie slack
+    s, l, crosses = deque(maxlen=short), deque(maxlen=long), []
+    for p in prices:
+        s.append(p); l.append(p)
+        if len(l) < long:
+            crosses.append(None)
+            continue
+        sp = sum(s) / len(s)
+        lp = sum(l) / len(l)
+        crosses.append(1 if sp >= lp * strategy._TIE_FLOOR else -1)
+    return _crossings(crosses)
+
+
+def _exact_sma(short, long, ticks):
+    # integer tick counts: means compared without any rounding, ties go to the short side
+    s, l, crosses = deque(maxlen=short), deque(maxlen=long), []
+    for t in ticks:
+        s.append(t); l.append(t)
+        if len(l) < long:
+            crosses.append(None)
+            continue
+        crosses.append(1 if sum(s) * long >= sum(l) * short else -1)
+    return _crossings(crosses)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("base,tick", [(0.25, 1e-6), (100.0, 0.01), (60000.0, 0.01)])
+@pytest.mark.parametrize("short,long", [(5, 20), (10, 30), (50, 200)])
+def test_sma_running_sums_decide_ties_like_sum_len(seed, base, tick, short, long):
+    # quantized prices tie often; running sums must not flip them
+    prices, ticks = _quantized_walk(seed, base, tick, 5000)
+    strat = SMAStrategy(short, long)
+    got = [strat.update(p) for p in prices]
+    assert got == _sum_len_sma(short, long, prices)
+    assert got == _exact_sma(short, long, ticks)
+    assert SMAStrategy.backtest(short, long, prices).tolist() == got
+
+
+def test_sma_strategy_pickles_mid_stream():
+    import pickle
+
+    prices, _ = _quantized_walk(7, 100.0, 0.01, 400)
+    a = SMAStrategy(5, 20)
+    for p in prices[:200]:
+        a.update(p)
+    b = pickle.loads(pickle.dumps(a))
+    assert b._prev_cross == a._prev_cross
+    assert [b.update(p) for p in prices[200:]] == [a.update(p) for p in prices[200:]]
+
+
+def test_swing_update_returns_signal_codes_with_info():
+    from strategy import SwingConfig, SwingWithTrend
+
+    prices, _ = _quantized_walk(3, 100.0, 0.05, 3000)
+    sw = SwingWithTrend(SwingConfig(buy_pct=0.2, sell_pct=0.2, trend_window=20, trail_pct=1.0))
+    seen = set()
+    for p in prices:
+        sig = sw.update(p)
+        assert type(sig) is Signal
+        if sig != Signal.HOLD:
+            seen.add(sig)
+            assert sw.info["reason"] in ("trail_stop", "above_band", "below_band")
+    assert seen == {Signal.BUY, Signal.SELL}
+
+
+def _swing_trace(sw, prices, start=0):
+    out = []
+    for ts, p in enumerate(prices[start:], start):
+        sig = sw.update(p, ts)
+        out.append((sig, sw.info if sig else None))
+    return out
+
+
+def test_indicator_cache_matches_unshared_with_a_late_instance():
+    from strategy import IndicatorCache, SwingConfig, SwingWithTrend
+
+    prices, _ = _quantized_walk(11, 100.0, 0.05, 600)
+    cfg_a = SwingConfig(buy_pct=0.2, sell_pct=0.2, trend_window=20, atr_cap_pct=50.0)
+    cfg_b = SwingConfig(buy_pct=0.4, sell_pct=0.1, trend_window=30, atr_cap_pct=50.0)
+    want = _swing_trace(SwingWithTrend(cfg_a), prices)
+    assert any(sig for sig, _ in want)
+
+    cache = IndicatorCache()
+    a = SwingWithTrend(cfg_a, cache, feed="DOGE-USD")
+    got = _swing_trace(a, prices[:300])
+    b = SwingWithTrend(cfg_b, cache, feed="DOGE-USD")  # joins mid-stream
+    for ts, p in enumerate(prices[300:], 300):
+        b.update(p, ts)  # b goes first, so it does the shared step
+        sig = a.update(p, ts)
+        got.append((sig, a.info if sig else None))
+    assert got == want
+    assert b.rsi is a.rsi and b.atr is a.atr
+    assert len(cache._shared) == 2  # one RSI, one ATR
+
+
+def test_indicator_cache_refuses_mismatched_feeds():
+    from strategy import IndicatorCache, SwingConfig, SwingWithTrend
+
+    cfg = SwingConfig(buy_pct=1.0, sell_pct=1.0, trend_window=5)
+    cache = IndicatorCache()
+    a = SwingWithTrend(cfg, cache, feed="X")
+    b = SwingWithTrend(cfg, cache, feed="X")  # misnamed: really reads another feed
+    c = SwingWithTrend(cfg, cache, feed="Y")
+    for ts, p in enumerate([10.0, 10.5]):
+        a.update(p, ts)
+        c.update(p * 3, ts)  # own feed key: no clash
+    b.update(20.0, 0)
+    with pytest.raises(ValueError):
+        b.update(21.0, 1)
+    with pytest.raises(ValueError):
+        a.update(10.2)  # shared indicators need the tick's ts
+
+
+def test_indicator_cache_refuses_instances_out_of_lockstep():
+    from strategy import IndicatorCache, SwingConfig, SwingWithTrend
+
+    cfg = SwingConfig(buy_pct=1.0, sell_pct=1.0, trend_window=5, threshold_abs=0.3)
+    cache = IndicatorCache()
+    a = SwingWithTrend(cfg, cache)
+    prices = [10.0, 10.5, 10.6, 10.9]
+    for ts, p in enumerate(prices[:3]):
+        a.update(p, ts)  # keeps ts 0 and 1, filters 10.6
+    late = SwingWithTrend(cfg, cache)
+    late.update(prices[2], 2)  # keeps 10.6, so its next delta starts at ts 2
+    with pytest.raises(ValueError):
+        late.update(prices[3], 3)
+
+
+def _gauss_walk(seed, n, sigma=0.002, decimals=None):
+    rng = random.Random(seed)
+    px = [100.0]
+    for _ in range(n):
+        px.append(px[-1] * (1.0 + rng.gauss(0.0, sigma)))
+    if decimals is not None:
+        px = [round(p, decimals) for p in px]
+    return px
+
+
+@pytest.mark.parametrize("decimals", [None, 2])
+@pytest.mark.parametrize("short,long", [(2, 3), (5, 20), (10, 50)])
+def test_sma_backtest_matches_update(decimals, short, long):
+    prices = _gauss_walk(1, 20000, decimals=decimals)
+    strat = SMAStrategy(short, long)
+    assert SMAStrategy.backtest(short, long, prices).tolist() == [strat.update(p) for p in prices]
+
+
+@pytest.mark.parametrize("decimals", [None, 2])
+@pytest.mark.parametrize("kw", [
+    {},
+    {"trail_pct": 2.0},
+    {"enable_rsi": False},
+    {"enable_atr": False, "trail_pct": 1.0},
+    {"threshold_abs": 0.2, "trail_pct": 1.5},
+    {"atr_cap_pct": 0.17},
+    {"trail_pct": 1.0, "trail_lookback": 1},
+    {"trail_pct": 1.0, "trail_lookback": 30},
+    {"trail_pct": 0.5, "trail_lookback": 500, "enable_atr": False},
+    {"trail_pct": 1.0, "trail_lookback": 10 ** 7},
+    {"rsi_window": 5, "atr_window": 30, "trend_window": 7},
+])
+def test_swing_backtest_matches_update(decimals, kw):
+    # order-exact kernels: the vectorized replay must agree tick for tick, ties included
+    from strategy import SwingConfig, SwingWithTrend
+
+    cfg = SwingConfig(**{"buy_pct": 1.0, "sell_pct": 1.0, "trend_window": 20, **kw})
+    prices = _gauss_walk(2, 20000, decimals=decimals)
+    sw = SwingWithTrend(cfg)
+    want = [sw.update(p) for p in prices]
+    assert SwingWithTrend.backtest(cfg, prices).tolist() == want
+    assert any(want)
+
+
+def test_backtests_handle_short_series():
+    from strategy import SwingConfig, SwingWithTrend
+
+    cfg = SwingConfig(buy_pct=1.0, sell_pct=1.0, trend_window=20)
+    for n in (0, 1, 3, 19, 20):
+        assert SwingWithTrend.backtest(cfg, _gauss_walk(0, n)[:n]).tolist() == [0] * n
+        assert SMAStrategy.backtest(5, 20, _gauss_walk(0, n)[:n]).tolist() == [0] * n
+
+
+def test_both_strategies_take_price_and_ts():
+    from strategy import SwingConfig, SwingWithTrend
+
+    prices, _ = _quantized_walk(5, 100.0, 0.01, 500)
+    for make in (lambda: SMAStrategy(2, 3),
+                 lambda: SwingWithTrend(SwingConfig(buy_pct=0.05, sell_pct=0.05, trend_window=5))):
+        a, b = make(), make()
+        for ts, p in enumerate(prices):
+            sig = a.update(p, 123.0 + ts)
+            assert type(sig) is Signal
+            assert sig == b.update(p)
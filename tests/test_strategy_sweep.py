@@ -0,0 +1,53 @@
+# tests/test_strategy_sweep.py
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import strategy_sweep
+from strategy import SMAStrategy
+
+
+def _walk(seed, n=400):
+    rng = random.Random(seed)
+    px = [100.0]
+    for _ in range(n):
+        px.append(px[-1] * (1.0 + rng.uniform(-0.01, 0.01)))
+    return px
+
+
+def test_sweep_scores_each_valid_combo_best_first(monkeypatch):
+    created = []
+
+    class _Recording(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if kwargs.get("create"):
+                created.append(self.name)
+
+    monkeypatch.setattr(strategy_sweep.shared_memory, "SharedMemory", _Recording)
+    px = _walk(1)
+    grid = {"short": [3, 5, 10], "long": [5, 10]}
+    results = strategy_sweep.sweep(px, "sma", grid, max_workers=2)
+
+    combos = [(r["params"]["short"], r["params"]["long"]) for r in results]
+    assert sorted(combos) == [(3, 5), (3, 10), (5, 10)]  # short >= long dropped
+    returns = [r["return_pct"] for r in results]
+    assert returns == sorted(returns, reverse=True)
+    arr = np.asarray(px)
+    for r in results:
+        p = r["params"]
+        want = strategy_sweep._score(arr, SMAStrategy.backtest(p["short"], p["long"], arr))
+        assert (r["trades"], r["return_pct"]) == (want["trades"], want["return_pct"])
+
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
+
+
+def test_sweep_propagates_backtest_errors():
+    with pytest.raises(TypeError):
+        strategy_sweep.sweep(_walk(2, 50), "swingT",
+                             {"buy_pct": [2.0], "sell_pct": [4.0], "trend_window": [20], "bogus": [1]},
+                             max_workers=1)